@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Cold start lookups: load()+find() versus a compiled hash database
+
+Usage::
+
+    python benchmarks/bench_hashdb.py [--entries N] [--lookups N]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from hostsmgr import HostsMgr  # noqa
+from hostsmgr.hashdb import compile_hosts, HashDB  # noqa
+from hostsmgr.conditions import Host  # noqa
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--lookups', type=int, default=100)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    source = os.path.join(directory, 'hosts')
+    with open(source, 'w') as hosts_file:
+        for i in range(args.entries):
+            hosts_file.write('10.%s.%s.%s host%s\n' % (
+                i >> 16 & 255, i >> 8 & 255, i & 255, i))
+
+    names = ['host%s' % random.randrange(args.entries * 2)
+             for _ in range(args.lookups)]
+
+    def text():
+        mgr = HostsMgr()
+        mgr.load(source)
+        return [mgr.find(Host(name)) for name in names]
+
+    def hashdb():
+        with HashDB(compile_hosts(source)) as db:
+            return [db.find(Host(name)) for name in names]
+
+    elapsed, expected = timed(text)
+    print('load()+find()       : %8.1f ms' % (elapsed * 1000))
+
+    elapsed, _ = timed(hashdb)
+    print('compile (first run) : %8.1f ms' % (elapsed * 1000))
+
+    elapsed, found = timed(hashdb)
+    print('open+find (cached)  : %8.1f ms' % (elapsed * 1000))
+
+    assert [[e.expansion for e in r] for r in found] == [
+        [e.expansion for e in r] for r in expected]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Report the cold-start import cost of hostsmgr via `python -X importtime`
+
+Usage::
+
+    python benchmarks/bench_import.py [--repeat N]
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = [
+    ('import hostsmgr', 'import hostsmgr'),
+    ('access HostsMgr', 'import hostsmgr; hostsmgr.HostsMgr'),
+    ('load + check', 'import hostsmgr; from hostsmgr.conditions import Host; '
+     'm = hostsmgr.HostsMgr(); m.loads("127.0.0.1 localhost"); '
+     'm.check(Host("localhost"))'),
+]
+
+
+def measure(code):
+    """Run code in a fresh interpreter and parse the -X importtime report
+
+    :return: Dict of module name to (self us, cumulative us, is top level)
+    :rtype: dict
+    """
+
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        stderr=subprocess.PIPE, env=env, check=True, cwd=ROOT,
+        universal_newlines=True).stderr
+
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # Top level imports are not indented
+        modules[name.strip()] = (
+            int(self_us), int(cumulative_us), not name.startswith('  '))
+
+    return modules
+
+
+def import_cost(modules, startup_modules):
+    """Sum up the cumulative cost of top level imports that a plain
+    interpreter startup does not import
+    """
+
+    return sum(cumulative for name, (_, cumulative, top) in modules.items()
+               if top and name not in startup_modules)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=5,
+                        help='How many most expensive modules to show')
+    args = parser.parse_args()
+
+    startup_modules = measure('pass')
+    for title, code in SCENARIOS:
+        results = [measure(code) for _ in range(args.repeat)]
+        modules = min(results,
+                      key=lambda m: import_cost(m, startup_modules))
+        print('%-16s %8.2f ms' % (
+            title, import_cost(modules, startup_modules) / 1000.0))
+        top = sorted(
+            ((name, m[0]) for name, m in modules.items()
+             if name not in startup_modules),
+            key=lambda m: m[1], reverse=True)
+        for name, self_us in top[:args.top]:
+            print('    %-30s %8.2f ms' % (name, self_us / 1000.0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Throughput of ThreadSafeHostsMgr under a mixed read/refresh load
+
+Usage::
+
+    python benchmarks/bench_threadsafe.py [--entries N] [--readers N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from hostsmgr import HostsMgr  # noqa
+from hostsmgr.threadsafe import ThreadSafeHostsMgr  # noqa
+from hostsmgr.entries import HostsEntry  # noqa
+from hostsmgr.conditions import Host, InlineComment  # noqa
+
+
+def build(cls, entries):
+    mgr = cls()
+    mgr.loads(''.join('10.%s.%s.%s host%s\n' % (
+        i >> 16 & 255, i >> 8 & 255, i & 255, i) for i in range(entries)))
+    return mgr
+
+
+def refresh(mgr):
+    mgr.remove_by_inline_comment(InlineComment('block'))
+    for i in range(10):
+        mgr.add(HostsEntry('192.168.0.%s' % i, ['block%s' % i], 'block'))
+
+
+def run(mgr, readers, duration):
+    stop = threading.Event()
+    counts = {'reads': 0, 'writes': 0}
+    count_lock = threading.Lock()
+
+    def reader(index):
+        reads = 0
+        host = Host('host%s' % index)
+        while not stop.is_set():
+            mgr.check(host)
+            reads += 1
+        with count_lock:
+            counts['reads'] += reads
+
+    def writer():
+        writes = 0
+        while not stop.is_set():
+            if isinstance(mgr, ThreadSafeHostsMgr):
+                with mgr.lock.writing():
+                    refresh(mgr)
+            else:
+                refresh(mgr)
+            writes += 1
+            time.sleep(0.001)
+        counts['writes'] = writes
+
+    threads = [threading.Thread(target=reader, args=(i,))
+               for i in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return counts['reads'] / duration, counts['writes'] / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=1000)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=2.0)
+    args = parser.parse_args()
+
+    for cls in [HostsMgr, ThreadSafeHostsMgr]:
+        mgr = build(cls, args.entries)
+        reads, writes = run(mgr, args.readers, args.duration)
+        print('%-20s %10.0f reads/s %8.0f refreshes/s' % (
+            cls.__name__, reads, writes))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,8 +2,38 @@
 
 """Top-level package for hostsmgr."""
 
-from .hostsmgr import HostsMgr  # noqa
+import sys
 
 __author__ = """Hong-She Liang"""
 __email__ = 'starofrainnight@gmail.com'
 __version__ = '0.2.4'
+
+# Public names and the submodules they live in. They are imported on first
+# access, so `import hostsmgr` stays cheap for short-lived processes.
+_lazy_exports = {
+    'HostsMgr': '.hostsmgr',
+}
+
+__all__ = list(_lazy_exports)
+
+
+def __getattr__(name):
+    module_name = _lazy_exports.get(name)
+    if module_name is None:
+        raise AttributeError(
+            "module %r has no attribute %r" % (__name__, name))
+
+    import importlib
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
+
+
+if sys.version_info < (3, 7):
+    # Module level __getattr__ is only supported since Python 3.7 (PEP 562)
+    from .hostsmgr import HostsMgr  # noqa
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+"""Compatibility helpers that avoid importing six on Python 3
+"""
+
+import sys
+
+if sys.version_info[0] >= 3:
+    string_types = (str,)
+else:
+    from six import string_types  # noqa
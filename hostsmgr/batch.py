@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+"""Apply one operation plan to many hosts files in parallel
+
+Each file is loaded, changed by the plan and saved atomically in a worker
+process. A file whose content hash already equals the planned result is not
+rewritten. Failures are collected per file, so one broken file doesn't stop
+the others.
+"""
+
+import os
+import hashlib
+import itertools
+from .hostsmgr import HostsMgr, write_atomic
+from .operations import (parse_operation, validate_operation,
+                         apply_operation, MUTATING_OPERATIONS)
+from .exceptions import InvalidFormat
+from ._compat import string_types
+
+
+class FileResult(object):
+    """Result of applying a plan to one file
+    """
+
+    #: The file is rewritten with the planned content
+    CHANGED = 'changed'
+    #: The file already has the planned content, not rewritten
+    UNCHANGED = 'unchanged'
+    #: Failed to load, change or save the file, it's left as it was
+    ERROR = 'error'
+
+    def __init__(self, path, status, sha256=None, error=None):
+        self.path = path
+        self.status = status
+        #: SHA-256 of the file content after the plan, None on error
+        self.sha256 = sha256
+        #: Error message, None if succeed
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.status != self.ERROR
+
+    def __repr__(self):
+        return '%s(%r, %r%s)' % (
+            type(self).__name__, self.path, self.status,
+            ', error=%r' % self.error if self.error else '')
+
+
+def _normalize_plan(plan):
+    operations = []
+    for op in plan:
+        if isinstance(op, string_types):
+            op = parse_operation(op)
+        else:
+            validate_operation(op)
+
+        if op['op'] not in MUTATING_OPERATIONS:
+            raise InvalidFormat(
+                "Operation '%s' doesn't modify hosts files" % op['op'])
+
+        operations.append(op)
+
+    return operations
+
+
+def apply_file(path, plan, force=False):
+    """Apply an operation plan to one hosts file
+
+    :param path: The hosts file path
+    :type path: str
+    :param plan: Validated operation dicts, see hostsmgr.operations
+    :type plan: list[dict]
+    :param force: Default 'force' of 'add' operations, defaults to False
+    :type force: bool, optional
+    :rtype: FileResult
+    """
+
+    try:
+        with open(path, 'rb') as hosts_file:
+            old = hosts_file.read()
+
+        mgr = HostsMgr()
+        mgr.loads(old.decode('utf-8'))
+        for op in plan:
+            apply_operation(mgr, op, force)
+
+        text = mgr.saves()
+        new = text.encode('utf-8')
+        digest = hashlib.sha256(new).hexdigest()
+        if digest == hashlib.sha256(old).hexdigest():
+            return FileResult(path, FileResult.UNCHANGED, digest)
+
+        write_atomic(path, [text])
+        return FileResult(path, FileResult.CHANGED, digest)
+    except Exception as e:
+        return FileResult(path, FileResult.ERROR,
+                          error='%s: %s' % (type(e).__name__, e))
+
+
+def apply_plan(paths, plan, max_workers=None, force=False):
+    """Apply one operation plan to many hosts files on a process pool
+
+    :param paths: Paths of hosts files
+    :type paths: list[str]
+    :param plan: Operations applied in order, operation dicts or text form
+        lines, see hostsmgr.operations. Only modifying operations are allowed.
+    :type plan: list[dict or str]
+    :param max_workers: Count of worker processes, defaults to None means
+        the count of CPUs
+    :type max_workers: int, optional
+    :param force: Default 'force' of 'add' operations, defaults to False
+    :type force: bool, optional
+    :raises InvalidFormat: If any operation of the plan is invalid, before any
+        file is touched
+    :return: Results in the order of paths
+    :rtype: list[FileResult]
+    """
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    paths = list(paths)
+    plan = _normalize_plan(plan)
+    if not paths:
+        return []
+
+    workers = max_workers or os.cpu_count() or 1
+    # Several files per task, so small files don't cost a round trip each
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(
+            apply_file, paths, itertools.repeat(plan),
+            itertools.repeat(force), chunksize=chunksize))
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+"""Bloom filter used as a hostname prefilter
+"""
+
+import math
+import hashlib
+
+
+class BloomFilter(object):
+    """A Bloom filter of strings
+
+    Membership tests never give false negatives, and give false positives at
+    about error_rate while no more than capacity keys added. Keys could not
+    be removed.
+
+    :param capacity: Expected count of keys
+    :type capacity: int
+    :param error_rate: Expected false positive rate, defaults to 0.01
+    :type error_rate: float, optional
+    :raises ValueError: If capacity or error_rate out of range
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        if capacity < 1:
+            raise ValueError('Capacity must be positive : %s' % capacity)
+        if not 0 < error_rate < 1:
+            raise ValueError(
+                'Error rate must be between 0 and 1 : %s' % error_rate)
+
+        ln2 = math.log(2)
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._size = max(8, int(math.ceil(
+            -capacity * math.log(error_rate) / (ln2 * ln2))))
+        self._hashes = max(1, int(round(self._size / capacity * ln2)))
+        self._bits = bytearray((self._size + 7) // 8)
+        self._count = 0
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def error_rate(self):
+        return self._error_rate
+
+    @property
+    def memory(self):
+        """Size of the bit array in bytes
+        """
+
+        return len(self._bits)
+
+    def __len__(self):
+        """Count of added keys (including duplicated ones)
+        """
+
+        return self._count
+
+    def _positions(self, key):
+        # Double hashing, k positions from two parts of one digest (sha1 is
+        # available on every supported Python, unlike blake2b)
+        digest = hashlib.sha1(key.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        size = self._size
+        return [(h1 + i * h2) % size for i in range(self._hashes)]
+
+    def add(self, key):
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+
+        self._count += 1
+
+    def __contains__(self, key):
+        bits = self._bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+
+        return True
+
+    def __repr__(self):
+        return '%s(capacity=%s, error_rate=%s, count=%s, memory=%s)' % (
+            type(self).__name__, self._capacity, self._error_rate,
+            self._count, self.memory)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+"""Command line interface of hostsmgr
+
+All operations of one invocation are applied to a single loaded hosts table,
+which is saved atomically once at the end (only if anything changed).
+Operations are given as arguments or read from stdin, one per line, either in
+text form or as JSON objects, see hostsmgr.operations for the format.
+
+Examples::
+
+    hostsmgr add 127.0.0.1 myhost '#dev' \\; query myhost
+    printf 'remove-tag dev\\nadd 10.0.0.1 db #dev\\n' | hostsmgr
+"""
+
+import sys
+import json
+import signal
+import argparse
+from .hostsmgr import HostsMgr, guess_hosts_path
+from .operations import parse_operation, apply_operation, entry_to_dict
+from .exceptions import HostsNotFound
+
+
+def _split_arguments(args):
+    """Split command line arguments into operation lines by ';'
+    """
+
+    lines = []
+    current = []
+    for arg in args:
+        if arg == ';':
+            lines.append(current)
+            current = []
+        else:
+            current.append(arg)
+    lines.append(current)
+
+    return [' '.join(line) for line in lines if line]
+
+
+def _read_operations(lines):
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        # Skip empty lines and comments
+        if not line or line.startswith('#'):
+            continue
+
+        yield lineno, line
+
+
+def _print_result(op, result, as_json, out):
+    if as_json:
+        json.dump({
+            'op': op['op'],
+            'query': op.get('host') or op.get('address'),
+            'entries': [entry_to_dict(entry) for entry in result],
+        }, out)
+        out.write('\n')
+    else:
+        for entry in result:
+            out.write(entry.expansion + '\n')
+
+
+def _serve(path, args):
+    from .daemon import HostsDaemon
+
+    # Save pending changes on SIGTERM just like on Ctrl+C
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    daemon = HostsDaemon(path, args.serve, debounce=args.debounce)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.shutdown()
+
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='hostsmgr', description='Manage hosts file.',
+        epilog='Operations: add ADDRESS HOST... [#TAG], remove HOST..., '
+        'remove-tag TAG, query HOST_OR_ADDRESS, dedupe. Separate multiple '
+        "operations by ';'. Without operations, they are read from stdin "
+        '(one text or JSON operation per line).')
+    parser.add_argument(
+        '-f', '--file', help='The hosts file, defaults to the system hosts')
+    parser.add_argument(
+        '-o', '--output',
+        help="Save to this file instead of the input file, '-' for stdout")
+    parser.add_argument(
+        '--force', action='store_true',
+        help='Let add replace existing hosts instead of failing')
+    parser.add_argument(
+        '-k', '--keep-going', action='store_true',
+        help='Report failed operations and continue, instead of aborting '
+        'without saving')
+    parser.add_argument(
+        '-n', '--dry-run', action='store_true',
+        help="Don't save any changes")
+    parser.add_argument(
+        '--json', action='store_true', help='Print query results as JSON')
+    parser.add_argument(
+        '--serve', metavar='SOCKET',
+        help='Run as daemon serving the hosts file on this Unix socket')
+    parser.add_argument(
+        '--debounce', type=float, default=0.5,
+        help='Seconds the daemon coalesces changes before saving')
+    parser.add_argument('operations', nargs=argparse.REMAINDER)
+    return parser
+
+
+def main(argv=None, stdin=None, stdout=None, stderr=None):
+    """Run the command line interface
+
+    :return: Exit status
+    :rtype: int
+    """
+
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+
+    args = build_parser().parse_args(argv)
+
+    try:
+        path = args.file or guess_hosts_path()
+    except HostsNotFound:
+        stderr.write('hostsmgr: hosts file not found, use --file\n')
+        return 2
+
+    if args.serve:
+        return _serve(path, args)
+
+    if args.operations:
+        lines = _read_operations(_split_arguments(args.operations))
+    else:
+        lines = _read_operations(stdin)
+
+    mgr = HostsMgr()
+    try:
+        mgr.load(path)
+    except OSError as e:
+        stderr.write('hostsmgr: %s\n' % e)
+        return 2
+
+    changed = False
+    failed = False
+    for lineno, line in lines:
+        try:
+            op = parse_operation(line)
+            result = apply_operation(mgr, op, force=args.force)
+        except ValueError as e:
+            stderr.write('hostsmgr: operation %s (%s): %s\n' % (
+                lineno, line, e))
+            failed = True
+            if args.keep_going:
+                continue
+            stderr.write('hostsmgr: aborted, nothing saved\n')
+            return 1
+
+        if op['op'] == 'query':
+            _print_result(op, result, args.json, stdout)
+        else:
+            changed = changed or result
+
+    if args.dry_run:
+        pass
+    elif args.output == '-':
+        mgr.save(stdout)
+    elif args.output:
+        mgr.save(args.output, atomic=True)
+    elif changed:
+        mgr.save(path, atomic=True)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
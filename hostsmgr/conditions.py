@@ -2,7 +2,6 @@
 """A series conditions that use for search from a hosts table
 """
 
-import ipaddress
 from .entries import HostsEntry, CommentEntry, RawEntry
 
 
@@ -30,7 +29,10 @@ class Condition(object):
 
 
 class Operator(Condition):
-    pass
+
+    @property
+    def conditions(self):
+        return self._conds
 
 
 class Any(Operator):
@@ -70,6 +72,10 @@ class _Not(Operator):
 
         self._cond = cond
 
+    @property
+    def conditions(self):
+        return (self._cond,)
+
     def __call__(self, entry):
         return not self._cond(entry)
 
@@ -116,8 +122,14 @@ class IPAddress(HostsEntryFilter):
     def __init__(self, address):
         super().__init__()
 
+        import ipaddress
+
         self._address = ipaddress.ip_address(address)
 
+    @property
+    def address(self):
+        return self._address
+
     def __call__(self, entry):
         if not super().__call__(entry):
             return False
@@ -126,12 +138,27 @@ class IPAddress(HostsEntryFilter):
 
 
 class Host(HostsEntryFilter):
+    """Match hosts entries which have the host
 
-    def __init__(self, host):
+    :param host: The hostname
+    :type host: str
+    :param normalizer: Normalize the hostname by it, to match hosts tables
+        loaded with the same normalizer, defaults to None
+    :type normalizer: callable, optional
+    """
+
+    def __init__(self, host, normalizer=None):
         super().__init__()
 
+        if normalizer is not None:
+            host = normalizer(host)
+
         self._host = host
 
+    @property
+    def host(self):
+        return self._host
+
     def __call__(self, entry):
         if not super().__call__(entry):
             return False
@@ -152,6 +179,9 @@ class InlineComment(HostsEntryFilter):
         if not super().__call__(entry):
             return False
 
+        if entry.comment is None:
+            return False
+
         if self._case_sensitivity:
             if self._partial:
                 return self._value in entry.comment
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+
+"""Hosts management daemon that serve one in-memory hosts table over an Unix
+domain socket
+
+The protocol is newline delimited JSON. Each request is an operation dict
+(see hostsmgr.operations) or one of the daemon only operations:
+
+* ``{"op": "resolve", "host": HOST}``: Addresses of the host
+* ``{"op": "flush"}``: Save pending changes immediately
+
+Each response is ``{"ok": true, "result": RESULT}`` or
+``{"ok": false, "error": MESSAGE}``. A connection could send any number of
+requests, so lookups don't pay for connecting and parsing the hosts file.
+
+Mutations are coalesced: the first change after a save schedules an atomic
+save after the debounce interval, further changes in the meantime are saved
+together by it.
+"""
+
+import os
+import json
+import stat
+import errno
+import socket
+import logging
+import threading
+import socketserver
+from .hostsmgr import HostsMgr, write_atomic
+from .conditions import Host
+from .operations import (apply_operation, entry_to_dict,
+                         MUTATING_OPERATIONS)
+
+logger = logging.getLogger(__name__)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+
+            try:
+                op = json.loads(line.decode('utf-8'))
+                if not isinstance(op, dict):
+                    raise ValueError('Request must be a JSON object!')
+                response = {'ok': True,
+                            'result': self.server.hosts_daemon.execute(op)}
+            except Exception as e:
+                # Report any failure to the client and keep the connection
+                response = {'ok': False, 'error': str(e) or repr(e)}
+
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class HostsDaemon(object):
+    """Serve a hosts file over an Unix domain socket
+
+    :param path: The hosts file path
+    :type path: str
+    :param socket_path: The Unix domain socket path
+    :type socket_path: str
+    :param debounce: How many seconds to wait for coalescing changes before
+        saving them, defaults to 0.5
+    :type debounce: float, optional
+    :param mgr: The hosts manager to serve, defaults to a new HostsMgr loaded
+        from path
+    :type mgr: HostsMgr, optional
+    """
+
+    def __init__(self, path, socket_path, debounce=0.5, mgr=None):
+        self._path = path
+        self._socket_path = socket_path
+        self._debounce = debounce
+
+        if mgr is None:
+            mgr = HostsMgr()
+            mgr.load(path)
+        self._mgr = mgr
+
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        # Changes are counted, so a save only clears the changes it wrote
+        self._version = 0
+        self._saved_version = 0
+        self._timer = None
+        self._thread = None
+
+        self._remove_stale_socket(socket_path)
+
+        self._server = _UnixServer(socket_path, _RequestHandler)
+        self._server.hosts_daemon = self
+
+    @staticmethod
+    def _remove_stale_socket(socket_path):
+        """Remove the socket left by a previous daemon
+
+        :raises OSError: If another daemon is still listening on it
+        """
+
+        try:
+            if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                return
+        except OSError:
+            return
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            # Nobody is listening, it's stale
+            os.remove(socket_path)
+        else:
+            raise OSError(
+                errno.EADDRINUSE,
+                'Another daemon is listening on %s' % socket_path)
+        finally:
+            probe.close()
+
+    @property
+    def mgr(self):
+        return self._mgr
+
+    def execute(self, op):
+        """Execute an operation and return it's JSON serializable result
+
+        :param op: The operation dict
+        :type op: dict
+        :raises ValueError: If the operation failed
+        """
+
+        name = op.get('op')
+        if name == 'flush':
+            self.flush()
+            return True
+
+        with self._lock:
+            if name == 'resolve':
+                if not op.get('host'):
+                    raise ValueError("Operation 'resolve' requires 'host'")
+                return [entry.address.compressed
+                        for entry in self._mgr.find(Host(op.get('host')))]
+
+            result = apply_operation(self._mgr, op)
+            if name == 'query':
+                return [entry_to_dict(entry) for entry in result]
+
+            if (name in MUTATING_OPERATIONS) and result:
+                self._mark_dirty()
+
+            return result
+
+    def _mark_dirty(self):
+        # Must be called with self._lock held
+        self._version += 1
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        # Must be called with self._lock held
+        if self._timer is None:
+            self._timer = threading.Timer(self._debounce, self._flush_later)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_later(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Failed to save %s, will retry', self._path)
+
+    def flush(self):
+        """Save pending changes to the hosts file
+
+        If saving failed, the changes stay pending and another save is
+        scheduled after the debounce interval.
+        """
+
+        # Serialize the writers, so an older snapshot never replaces a newer
+        with self._save_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+                if self._version == self._saved_version:
+                    return
+
+                text = self._mgr.saves()
+                version = self._version
+
+            try:
+                write_atomic(self._path, [text])
+            except Exception:
+                with self._lock:
+                    self._schedule_flush()
+                raise
+
+            with self._lock:
+                self._saved_version = version
+
+    def serve_forever(self):
+        """Serve requests until shutdown() is called
+        """
+
+        self._server.serve_forever()
+
+    def start(self):
+        """Serve requests in a background thread
+        """
+
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def shutdown(self):
+        """Stop serving, save pending changes and remove the socket
+        """
+
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+
+        self._server.server_close()
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                # Don't retry behind a stopped daemon, the caller sees the
+                # error of the final save
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+            try:
+                os.remove(self._socket_path)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+
+class HostsClient(object):
+    """Client of HostsDaemon
+
+    :param socket_path: The daemon's Unix domain socket path
+    :type socket_path: str
+    :param timeout: Socket timeout in seconds, defaults to None
+    :type timeout: float, optional
+    """
+
+    def __init__(self, socket_path, timeout=None):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(socket_path)
+        self._file = self._socket.makefile('rwb')
+
+    def request(self, op):
+        """Send an operation and wait for it's result
+
+        :param op: The operation dict
+        :type op: dict
+        :raises ValueError: If the daemon failed to execute the operation
+        :return: The operation result
+        """
+
+        self._file.write(json.dumps(op).encode('utf-8') + b'\n')
+        self._file.flush()
+
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError('Connection closed by daemon!')
+
+        response = json.loads(line.decode('utf-8'))
+        if not response['ok']:
+            raise ValueError(response['error'])
+
+        return response['result']
+
+    def add(self, address, hosts, comment=None, force=False):
+        return self.request({'op': 'add', 'address': address,
+                             'hosts': hosts, 'comment': comment,
+                             'force': force})
+
+    def remove(self, hosts):
+        return self.request({'op': 'remove', 'hosts': hosts})
+
+    def remove_tag(self, tag, partial=False):
+        return self.request({'op': 'remove-tag', 'tag': tag,
+                             'partial': partial})
+
+    def find(self, host=None, address=None):
+        """Find entries by host or address
+
+        :return: Matched entries as dicts with address, hosts and comment
+        :rtype: list[dict]
+        """
+
+        if address is not None:
+            return self.request({'op': 'query', 'address': address})
+        return self.request({'op': 'query', 'host': host})
+
+    def resolve(self, host):
+        """Resolve a host to it's addresses
+
+        :rtype: list[str]
+        """
+
+        return self.request({'op': 'resolve', 'host': host})
+
+    def flush(self):
+        return self.request({'op': 'flush'})
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,9 +1,7 @@
 # -*- coding: utf-8 -*-
 
-import re
-import ipaddress
 from .exceptions import InvalidFormat
-from six import string_types
+from ._compat import string_types
 
 
 class Entry(object):
@@ -39,11 +37,14 @@ class CommentEntry(Entry):
 
     @classmethod
     def from_string(cls, value):
-        matched = re.match(r'(\s*)#(.*)', value)
-        if not matched:
+        # Plain str operations instead of regular expressions, so parsing
+        # don't need to import the (expensive) re module
+        stripped = value.lstrip()
+        if not stripped.startswith('#'):
             raise InvalidFormat()
 
-        return cls(matched.group(2), matched.group(1))
+        prefix = value[:len(value) - len(stripped)]
+        return cls(stripped[1:].split('\n', 1)[0], prefix)
 
 
 class HostsEntry(Entry):
@@ -54,6 +55,8 @@ class HostsEntry(Entry):
         self._comment = comment
 
     def _to_address(self, value):
+        import ipaddress
+
         if isinstance(value, string_types):
             return ipaddress.ip_address(value)
         elif isinstance(value, ipaddress._BaseAddress):
@@ -92,34 +95,58 @@ class HostsEntry(Entry):
         return parts[0] + '\t' + ' '.join(parts[1:])
 
     @classmethod
-    def from_string(cls, value):
-        matched = re.match(r'([^#]+)#(.*)', value)
+    def from_string(cls, value, normalizer=None):
         comment = None
-        if matched:
-            value = matched.group(1)
-            comment = matched.group(2)
-
-        # Don't use str's split! It will split on dot '.' (Which valid in host
-        # name.
-        parts = re.split(r'\s+', value.rstrip())
+        index = value.find('#')
+        if index > 0:
+            comment = value[index + 1:].split('\n', 1)[0]
+            value = value[:index]
+
+        # Split on whitespace runs, a leading whitespace gives an empty first
+        # field (which is not an IP address).
+        value = value.rstrip()
+        parts = value.split()
+        if value[:1].isspace():
+            parts.insert(0, '')
         if len(parts) < 2:
             raise InvalidFormat()
+
+        # Imported on first use, so importing this module stays cheap
+        import ipaddress
+
         try:
             address = ipaddress.ip_address(parts[0])
         except ValueError:
             raise InvalidFormat(
                 "First field isn't an IP Address : %s" % value)
 
-        return cls(address, parts[1:], comment)
+        hosts = parts[1:]
+        if normalizer is not None:
+            # InvalidHostname is an InvalidFormat too
+            hosts = [normalizer(host) for host in hosts]
 
+        return cls(address, hosts, comment)
 
-def from_string(value):
-    entry_classes = [CommentEntry, HostsEntry]
 
-    for cls in entry_classes:
-        try:
-            return cls.from_string(value)
-        except InvalidFormat:
-            pass
+def from_string(value, normalizer=None):
+    """Parse a hosts file line
+
+    :param value: The line without line ending
+    :type value: str
+    :param normalizer: Normalize hostnames by it, a line with invalid
+        hostname become a RawEntry, defaults to None
+    :type normalizer: callable, optional
+    :rtype: Entry
+    """
+
+    try:
+        return CommentEntry.from_string(value)
+    except InvalidFormat:
+        pass
+
+    try:
+        return HostsEntry.from_string(value, normalizer)
+    except InvalidFormat:
+        pass
 
     return RawEntry.from_string(value)
@@ -7,3 +7,7 @@ class HostsNotFound(OSError):
 
 class InvalidFormat(ValueError):
     pass
+
+
+class InvalidHostname(InvalidFormat):
+    pass
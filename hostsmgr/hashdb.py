@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+
+"""Constant on-disk hash database compiled from a hosts table
+
+The file layout follows D. J. Bernstein's cdb: a header of 256 (position,
+slots) pairs, the records (key length, data length, key, data), then 256
+open addressing hash tables of (hash, record position) slots. All integers
+are unsigned 32 bits little endian, so a database is limited to 4GB.
+
+Keys are ``h:<hostname>`` (data is one address) and ``a:<address>`` (data is
+one hostname), a key with several values is stored once per value. The
+lookups are done on a read only mmap, so opening a database don't read or
+parse the table, and a lookup only touches a few pages.
+"""
+
+import os
+import mmap
+import struct
+from .entries import HostsEntry
+from .conditions import Host, IPAddress, All, HostsEntryFilter
+
+_HEADER_SLOTS = 256
+_PAIR = struct.Struct('<II')
+_HEADER_SIZE = _HEADER_SLOTS * _PAIR.size
+# Hostnames and addresses never contain NUL
+_SOURCE_KEY = b'\0source'
+_GENERATION_KEY = b'\0generation'
+
+
+def _hash(key):
+    h = 5381
+    for c in key:
+        h = (((h << 5) + h) & 0xffffffff) ^ c
+
+    return h
+
+
+def _address_text(address):
+    import ipaddress
+
+    return str(ipaddress.ip_address(address))
+
+
+def _host_key(host):
+    return b'h:' + host.encode('utf-8')
+
+
+def _address_key(address):
+    return b'a:' + _address_text(address).encode('ascii')
+
+
+def source_signature(path):
+    """Get the signature that tells if a hosts file changed
+
+    :param path: The hosts file path
+    :type path: str
+    :return: The signature, None if the file doesn't exist
+    :rtype: str
+    """
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    return '%s:%s' % (st.st_mtime_ns, st.st_size)
+
+
+class _Writer(object):
+
+    def __init__(self, db_file):
+        self._file = db_file
+        self._file.write(b'\0' * _HEADER_SIZE)
+        self._pos = _HEADER_SIZE
+        self._tables = [[] for _ in range(_HEADER_SLOTS)]
+
+    def add(self, key, data):
+        h = _hash(key)
+        self._file.write(_PAIR.pack(len(key), len(data)))
+        self._file.write(key)
+        self._file.write(data)
+        self._tables[h & 0xff].append((h, self._pos))
+        self._advance(_PAIR.size + len(key) + len(data))
+
+    def _advance(self, size):
+        self._pos += size
+        if self._pos > 0xffffffff:
+            raise ValueError('Hash database exceeds 4GB!')
+
+    def finish(self):
+        header = []
+        for table in self._tables:
+            count = len(table) * 2
+            slots = [(0, 0)] * count
+            for h, pos in table:
+                i = (h >> 8) % count
+                while slots[i][1]:
+                    i = (i + 1) % count
+                slots[i] = (h, pos)
+
+            header.append((self._pos, count))
+            self._file.write(b''.join(_PAIR.pack(*slot) for slot in slots))
+            self._advance(count * _PAIR.size)
+
+        self._file.seek(0)
+        self._file.write(b''.join(_PAIR.pack(*pair) for pair in header))
+
+
+def export(mgr, path, signature=None, generation=None):
+    """Compile the hosts entries of a hosts table into a hash database
+
+    The database replaces path atomically, so opened readers keep their old
+    version. Comments are not exported.
+
+    :param mgr: The hosts table
+    :type mgr: hostsmgr.HostsMgr
+    :param path: The database file path
+    :type path: str
+    :param signature: Signature of the source hosts file, see
+        source_signature(), defaults to None
+    :type signature: str, optional
+    :param generation: Generation number of the database, defaults to None
+    :type generation: int, optional
+    """
+
+    import tempfile
+
+    hosts = {}
+    addresses = {}
+    for entry in mgr.ifind(HostsEntryFilter()):
+        address = str(entry.address)
+        for host in entry.hosts:
+            # dict as an ordered set, keep the hosts table order
+            hosts.setdefault(host, {})[address] = None
+            addresses.setdefault(address, {})[host] = None
+
+    path = os.path.realpath(path)
+    fd, temp_path = tempfile.mkstemp(
+        prefix='.' + os.path.basename(path) + '.',
+        dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as db_file:
+            writer = _Writer(db_file)
+            for host, values in hosts.items():
+                key = _host_key(host)
+                for address in values:
+                    writer.add(key, address.encode('ascii'))
+            for address, values in addresses.items():
+                key = b'a:' + address.encode('ascii')
+                for host in values:
+                    writer.add(key, host.encode('utf-8'))
+            if signature is not None:
+                writer.add(_SOURCE_KEY, signature.encode('ascii'))
+            if generation is not None:
+                writer.add(_GENERATION_KEY, str(generation).encode('ascii'))
+            writer.finish()
+
+            db_file.flush()
+            os.fsync(db_file.fileno())
+
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class HashDB(object):
+    """Read only lookups on a hash database created by export()
+
+    :param path: The database file path
+    :type path: str
+    """
+
+    def __init__(self, path):
+        self._path = path
+        with open(path, 'rb') as db_file:
+            st = os.fstat(db_file.fileno())
+            self._identity = (st.st_dev, st.st_ino)
+            self._map = mmap.mmap(db_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def identity(self):
+        """(device, inode) of the opened file, which changes when the
+        database is replaced
+        """
+
+        return self._identity
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get_all(self, key):
+        data = self._map
+        h = _hash(key)
+        table_pos, count = _PAIR.unpack_from(data, (h & 0xff) * _PAIR.size)
+        if not count:
+            return
+
+        i = (h >> 8) % count
+        for _ in range(count):
+            slot_hash, pos = _PAIR.unpack_from(
+                data, table_pos + i * _PAIR.size)
+            if not pos:
+                return
+
+            if slot_hash == h:
+                key_len, data_len = _PAIR.unpack_from(data, pos)
+                start = pos + _PAIR.size
+                if data[start:start + key_len] == key:
+                    start += key_len
+                    yield data[start:start + data_len]
+
+            i = (i + 1) % count
+
+    @property
+    def signature(self):
+        """Signature of the source hosts file, None if not recorded
+        """
+
+        for value in self._get_all(_SOURCE_KEY):
+            return value.decode('ascii')
+
+        return None
+
+    @property
+    def generation(self):
+        """Generation number of the database, None if not recorded
+        """
+
+        for value in self._get_all(_GENERATION_KEY):
+            return int(value)
+
+        return None
+
+    def addresses(self, host):
+        """Get the addresses of a hostname
+
+        :param host: The hostname
+        :type host: str
+        :return: Addresses in the order of the hosts table
+        :rtype: list[str]
+        """
+
+        return [v.decode('ascii') for v in self._get_all(_host_key(host))]
+
+    def hosts(self, address):
+        """Get the hostnames of an address
+
+        :param address: The IP address
+        :type address: str or ipaddress address
+        :return: Hostnames in the order of the hosts table
+        :rtype: list[str]
+        """
+
+        return [v.decode('utf-8')
+                for v in self._get_all(_address_key(address))]
+
+    def find(self, conditions):
+        """Find hosts entries by conditions
+
+        A Host or IPAddress condition (directly or inside All) is looked up in
+        the hash tables, the other conditions just filter what it found.
+        Entries are built from the lookup: one entry per address for a Host
+        lookup, one entry with all hostnames for an IPAddress lookup.
+
+        :param conditions: The entries must match this conditions
+        :type conditions: conditions.Condition
+        :raises ValueError: If conditions don't have a Host or IPAddress
+            condition to look up
+        :return: A list of founded entries
+        :rtype: list[HostsEntry]
+        """
+
+        if isinstance(conditions, list):
+            conditions = All(*conditions)
+
+        candidates = conditions.conditions if isinstance(
+            conditions, All) else (conditions,)
+        for cond in candidates:
+            if isinstance(cond, Host):
+                entries = [HostsEntry(address, [cond.host])
+                           for address in self.addresses(cond.host)]
+                break
+            elif isinstance(cond, IPAddress):
+                hosts = self.hosts(cond.address)
+                entries = [HostsEntry(cond.address, hosts)] if hosts else []
+                break
+        else:
+            raise ValueError(
+                'Conditions need a Host or IPAddress condition to look up!')
+
+        return [entry for entry in entries if conditions(entry)]
+
+    def check(self, conditions):
+        """Check if there have any entry matched with provided condition
+
+        :param conditions: The condition need to check for
+        :type conditions: conditions.Condition
+        :return: True if condition matched. Otherwise return False.
+        :rtype: bool
+        """
+
+        return bool(self.find(conditions))
+
+
+def compile_hosts(source, path=None):
+    """Compile a hosts file into a hash database if it's outdated
+
+    :param source: The hosts file path
+    :type source: str
+    :param path: The database file path, defaults to source + '.cdb'
+    :type path: str, optional
+    :return: The database file path
+    :rtype: str
+    """
+
+    from .hostsmgr import HostsMgr
+
+    if path is None:
+        path = source + '.cdb'
+
+    # Taken before loading, so a change during the load will be seen as
+    # outdated next time
+    signature = source_signature(source)
+    if os.path.exists(path):
+        with HashDB(path) as db:
+            if db.signature == signature:
+                return path
+
+    mgr = HostsMgr()
+    mgr.load(source)
+    export(mgr, path, signature)
+    return path
+
+
+def open_compiled(source, path=None):
+    """Open the hash database of a hosts file, regenerated if the hosts file
+    changed since it's compiled
+
+    :param source: The hosts file path
+    :type source: str
+    :param path: The database file path, defaults to source + '.cdb'
+    :type path: str, optional
+    :rtype: HashDB
+    """
+
+    return HashDB(compile_hosts(source, path))
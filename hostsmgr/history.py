@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+"""Saved versions of a hosts file stored as line deltas
+
+Every recorded version is stored as the line changes against the previous
+version, except one full snapshot per snapshot_interval versions, so
+restoring a version replays less than snapshot_interval deltas however long
+the history is. Version files are compressed by gzip or lzma and listed in
+an index file of JSON lines. A store should be written by one process at a
+time.
+"""
+
+import os
+import json
+import time
+import hashlib
+import difflib
+from collections import namedtuple
+
+#: A recorded version, kind is 'full' or 'delta'
+HistoryVersion = namedtuple('HistoryVersion', [
+    'version', 'timestamp', 'kind', 'sha256', 'filename'])
+
+_COMPRESSIONS = {
+    'gzip': '.gz',
+    'lzma': '.xz',
+    None: '',
+}
+_INDEX_FILENAME = 'index.jsonl'
+
+
+def _sha256(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _diff(old, new):
+    # Changed ranges of old lines as [start, end, new lines]. Common head and
+    # tail are trimmed first, so usual edits don't feed the whole file to
+    # SequenceMatcher.
+    limit = min(len(old), len(new))
+    head = 0
+    while head < limit and old[head] == new[head]:
+        head += 1
+
+    tail = 0
+    while tail < limit - head and old[-1 - tail] == new[-1 - tail]:
+        tail += 1
+
+    matcher = difflib.SequenceMatcher(
+        None, old[head:len(old) - tail], new[head:len(new) - tail])
+    return [[head + i1, head + i2, new[head + j1:head + j2]]
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+            if tag != 'equal']
+
+
+def _patch(old, delta):
+    new = []
+    position = 0
+    for start, end, lines in delta:
+        new.extend(old[position:start])
+        new.extend(lines)
+        position = end
+
+    new.extend(old[position:])
+    return new
+
+
+class HistoryStore(object):
+    """Versioned history of a hosts file
+
+    Pass it to HostsMgr.save(..., history=store) to record every saved
+    version.
+
+    :param directory: Directory of the version files, created if not exists
+    :type directory: str
+    :param snapshot_interval: Store a full snapshot every this much versions,
+        defaults to 20
+    :type snapshot_interval: int, optional
+    :param compression: 'gzip', 'lzma' or None, defaults to 'gzip'
+    :type compression: str, optional
+    :raises ValueError: If snapshot_interval or compression is invalid
+    """
+
+    def __init__(self, directory, snapshot_interval=20, compression='gzip'):
+        if snapshot_interval < 1:
+            raise ValueError(
+                'Snapshot interval must be positive : %s' % snapshot_interval)
+        if compression not in _COMPRESSIONS:
+            raise ValueError('Unsupported compression : %s' % compression)
+
+        self._directory = directory
+        self._snapshot_interval = snapshot_interval
+        self._compression = compression
+        self._versions = None
+        # Lines of the latest version, so recording don't restore it again
+        self._latest = None
+
+        os.makedirs(directory, exist_ok=True)
+
+    def _open(self, filename, mode):
+        path = os.path.join(self._directory, filename)
+        if filename.endswith('.gz'):
+            import gzip
+            return gzip.open(path, mode, encoding='utf-8')
+        elif filename.endswith('.xz'):
+            import lzma
+            return lzma.open(path, mode, encoding='utf-8')
+
+        return open(path, mode, encoding='utf-8')
+
+    def _load_index(self):
+        if self._versions is None:
+            self._versions = []
+            path = os.path.join(self._directory, _INDEX_FILENAME)
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as index_file:
+                    for line in index_file:
+                        if line.strip():
+                            self._versions.append(
+                                HistoryVersion(**json.loads(line)))
+
+        return self._versions
+
+    def versions(self):
+        """Get recorded versions, from the oldest to the latest
+
+        :rtype: list[HistoryVersion]
+        """
+
+        return list(self._load_index())
+
+    def record(self, text):
+        """Record a version
+
+        Nothing is recorded if text is the same as the latest version.
+
+        :param text: The hosts file content
+        :type text: str
+        :return: The version number of text
+        :rtype: int
+        """
+
+        versions = self._load_index()
+        digest = _sha256(text)
+        if versions and versions[-1].sha256 == digest:
+            return versions[-1].version
+
+        lines = text.splitlines(True)
+        since_full = 0
+        for item in reversed(versions):
+            if item.kind == 'full':
+                break
+            since_full += 1
+
+        version = versions[-1].version + 1 if versions else 1
+        if not versions or since_full + 1 >= self._snapshot_interval:
+            kind = 'full'
+            content = text
+        else:
+            kind = 'delta'
+            latest = self._latest
+            if (latest is None) or (latest[0] != versions[-1].version):
+                latest = (versions[-1].version,
+                          self._restore_lines(versions[-1].version))
+            content = json.dumps(_diff(latest[1], lines))
+
+        filename = '%08d.%s%s' % (
+            version, kind, _COMPRESSIONS[self._compression])
+        with self._open(filename, 'wt') as version_file:
+            version_file.write(content)
+
+        # Index written after the version file, so an interrupted record
+        # leaves an unlisted file instead of a broken version
+        item = HistoryVersion(version, time.time(), kind, digest, filename)
+        with open(os.path.join(self._directory, _INDEX_FILENAME), 'a',
+                  encoding='utf-8') as index_file:
+            index_file.write(json.dumps(item._asdict()) + '\n')
+
+        versions.append(item)
+        self._latest = (version, lines)
+        return version
+
+    def _restore_lines(self, version):
+        versions = self._load_index()
+        for i, item in enumerate(versions):
+            if item.version == version:
+                position = i
+                break
+        else:
+            raise ValueError('Version not recorded : %s' % version)
+
+        base = position
+        while versions[base].kind != 'full':
+            base -= 1
+
+        with self._open(versions[base].filename, 'rt') as version_file:
+            lines = version_file.read().splitlines(True)
+
+        for item in versions[base + 1:position + 1]:
+            with self._open(item.filename, 'rt') as version_file:
+                lines = _patch(lines, json.load(version_file))
+
+        if _sha256(''.join(lines)) != versions[position].sha256:
+            raise ValueError('Version %s is corrupted!' % version)
+
+        return lines
+
+    def restore(self, version):
+        """Get the content of a recorded version
+
+        :param version: The version number
+        :type version: int
+        :raises ValueError: If the version isn't recorded or corrupted
+        :return: The hosts file content
+        :rtype: str
+        """
+
+        return ''.join(self._restore_lines(version))
@@ -5,10 +5,13 @@
 import io
 import os
 import os.path
-from .entries import from_string as entry_from_string
+import time
+import errno
+from .entries import from_string as entry_from_string, RawEntry, HostsEntry
 from .exceptions import HostsNotFound
+from .storage import EntryList
 from .conditions import Any, All, IPAddress, Host, InlineComment
-from six import string_types
+from ._compat import string_types
 
 
 def guess_hosts_path():
@@ -51,18 +54,175 @@ def guess_hosts_path():
     raise HostsNotFound()
 
 
+def write_atomic(path, lines, encoding='utf-8'):
+    """Write lines to path atomically
+
+    The lines are written to a temporary file in the same directory which then
+    replaces the target, so readers never see a partially written file. The
+    permission bits and owner of an existing target are kept, and a symbolic
+    link is followed instead of being replaced.
+
+    A target which could not be replaced by rename (just like /etc/hosts bind
+    mounted into a container) is rewritten in place instead.
+
+    :param path: The target file path
+    :type path: str
+    :param lines: Lines (with line endings) to write
+    :type lines: list[str]
+    :param encoding: The file encoding, defaults to 'utf-8'
+    :type encoding: str, optional
+    """
+
+    import tempfile
+
+    path = os.path.realpath(path)
+    fd, temp_path = tempfile.mkstemp(
+        prefix='.' + os.path.basename(path) + '.',
+        dir=os.path.dirname(path))
+    try:
+        with io.open(fd, 'w', encoding=encoding) as temp_file:
+            temp_file.writelines(lines)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+
+        try:
+            st = os.stat(path)
+        except OSError:
+            # Target not exists yet, keep the default owner
+            os.chmod(temp_path, 0o644)
+        else:
+            os.chmod(temp_path, st.st_mode & 0o7777)
+            try:
+                os.chown(temp_path, st.st_uid, st.st_gid)
+            except (OSError, AttributeError):
+                # Not permitted (or not supported on this platform)
+                pass
+
+        try:
+            os.replace(temp_path, path)
+        except OSError as e:
+            if e.errno not in (errno.EBUSY, errno.EXDEV):
+                raise
+
+            with io.open(path, 'w', encoding=encoding) as hosts_file:
+                hosts_file.writelines(lines)
+            os.remove(temp_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+#: Minimal capacity of the hostname prefilter
+_MIN_PREFILTER_CAPACITY = 1024
+
+
 class HostsMgr(object):
     """Hosts file manager.
+
+    With a prefilter, a Bloom filter of all hostnames is kept, so finding a
+    Host that isn't in the hosts table returns without scanning the entries.
+    The prefilter follows the changes made through HostsMgr methods, call
+    rebuild_prefilter() after modifying hosts of entries directly.
+
+    :param metrics: Collect operation metrics into this registry, defaults to
+        None means instrumentation disabled
+    :type metrics: hostsmgr.metrics.Metrics, optional
+    :param prefilter: False positive rate of the hostname prefilter, defaults
+        to None means prefilter disabled
+    :type prefilter: float, optional
+    :param normalizer: Normalize hostnames of loaded and added entries by it
+        (just like a hostsmgr.normalize.Normalizer), so they are matched by
+        Host conditions with the same normalizer, defaults to None
+    :type normalizer: callable, optional
     """
 
-    def __init__(self):
-        self._entries = []
+    def __init__(self, metrics=None, prefilter=None, normalizer=None):
+        self._entries = EntryList()
+        self._metrics = metrics
+        self._normalizer = normalizer
+        self._prefilter_error_rate = prefilter
+        self._prefilter = None
+        self._prefilter_removed = 0
+        self.rebuild_prefilter()
+
+    @property
+    def metrics(self):
+        return self._metrics
+
+    @property
+    def normalizer(self):
+        return self._normalizer
+
+    @property
+    def prefilter(self):
+        """The hostname prefilter, None if disabled
+
+        :rtype: hostsmgr.bloom.BloomFilter
+        """
+
+        return self._prefilter
+
+    def rebuild_prefilter(self):
+        """Build the hostname prefilter from current entries again
+        """
+
+        if self._prefilter_error_rate is None:
+            return
+
+        from .bloom import BloomFilter
+
+        hosts = [host for entry in self._entries
+                 if isinstance(entry, HostsEntry) for host in entry.hosts]
+        # Leave room for adding as much hosts again before next rebuild
+        bloom = BloomFilter(max(len(hosts) * 2, _MIN_PREFILTER_CAPACITY),
+                            self._prefilter_error_rate)
+        for host in hosts:
+            bloom.add(host)
+
+        self._prefilter = bloom
+        self._prefilter_removed = 0
+
+    def _prefilter_add(self, entry):
+        bloom = self._prefilter
+        if (bloom is None) or not isinstance(entry, HostsEntry):
+            return
+
+        if len(bloom) + len(entry.hosts) > bloom.capacity:
+            # Entry added already, it will be collected by the rebuild
+            self.rebuild_prefilter()
+            return
+
+        for host in entry.hosts:
+            bloom.add(host)
+
+    def _prefilter_discard(self, count):
+        # Removed hosts stay in the filter as false positives, rebuild once
+        # they are too many
+        if (self._prefilter is None) or (count <= 0):
+            return
+
+        self._prefilter_removed += count
+        if self._prefilter_removed * 2 > len(self._prefilter):
+            self.rebuild_prefilter()
+
+    def _excluded(self, conditions):
+        # True if conditions definitely match nothing, by the prefilter
+        if isinstance(conditions, Host):
+            return conditions.host not in self._prefilter
+        elif isinstance(conditions, All):
+            return any(self._excluded(c) for c in conditions.conditions)
+        elif isinstance(conditions, Any):
+            return all(self._excluded(c) for c in conditions.conditions)
+
+        return False
 
     def clear(self):
         """Clear all entries
         """
 
         self._entries.clear()
+        self.rebuild_prefilter()
 
     def load(self, file):
         """Load hosts from file
@@ -74,20 +234,48 @@ class HostsMgr(object):
 
         self.clear()
 
+        metrics = self._metrics
+        if metrics is not None:
+            started = time.perf_counter()
+
         hosts_file = file
         if isinstance(file, string_types):
-            hosts_file = open(file, 'r')
+            hosts_file = open(file, 'r', encoding='utf-8')
 
         # Analyse hosts format
+        normalizer = self._normalizer
         try:
             for line in hosts_file.readlines():
                 # There maybe \r, \n or both at the end of line.
                 line = line.rstrip()
-                self._entries.append(entry_from_string(line))
+                self._entries.append(entry_from_string(line, normalizer))
         finally:
             if isinstance(file, string_types):
                 hosts_file.close()
 
+        self.rebuild_prefilter()
+
+        if metrics is not None:
+            metrics.observe('hostsmgr_load_seconds',
+                            time.perf_counter() - started)
+            self._record_parsed(metrics)
+
+    def _record_parsed(self, metrics):
+        counts = {}
+        failures = 0
+        for entry in self._entries:
+            type_name = type(entry).__name__
+            counts[type_name] = counts.get(type_name, 0) + 1
+            # Blank lines are RawEntry too, but they are not parse failures
+            if isinstance(entry, RawEntry) and entry.expansion.strip():
+                failures += 1
+
+        for type_name, count in counts.items():
+            metrics.incr('hostsmgr_lines_parsed_total', count,
+                         type=type_name)
+        if failures:
+            metrics.incr('hostsmgr_parse_fallbacks_total', failures)
+
     def loads(self, astr):
         """Load hosts items from string
 
@@ -97,24 +285,51 @@ class HostsMgr(object):
 
         self.load(io.StringIO(astr))
 
-    def save(self, file):
+    def save(self, file, atomic=False, history=None):
         """Save hosts to file
 
         :param file: The opened file object (should open with write text mode)
-            or str path to hosts file
+            or str path to hosts file (written in UTF-8)
         :type file: str or file object, optional
+        :param atomic: Replace the file atomically through a temporary file,
+            only takes effect if file is a str path, defaults to False
+        :type atomic: bool, optional
+        :param history: Record the saved content as a version into it,
+            defaults to None
+        :type history: hostsmgr.history.HistoryStore, optional
         """
 
-        hosts_file = file
-        if isinstance(file, string_types):
-            hosts_file = open(file, 'w')
+        metrics = self._metrics
+        if metrics is not None:
+            started = time.perf_counter()
 
-        try:
-            hosts_file.writelines(
-                [entry.expansion + '\n' for entry in self._entries])
-        finally:
+        lines = [entry.expansion + '\n' for entry in self._entries]
+
+        if atomic and isinstance(file, string_types):
+            write_atomic(file, lines)
+        else:
+            hosts_file = file
             if isinstance(file, string_types):
-                hosts_file.close()
+                hosts_file = open(file, 'w', encoding='utf-8')
+
+            try:
+                hosts_file.writelines(lines)
+            finally:
+                if isinstance(file, string_types):
+                    hosts_file.close()
+
+        if history is not None:
+            history.record(''.join(lines))
+
+        if metrics is not None:
+            metrics.observe('hostsmgr_save_seconds',
+                            time.perf_counter() - started)
+            # Paths are written in UTF-8, file objects in their own encoding
+            encoding = 'utf-8'
+            if not isinstance(file, string_types):
+                encoding = getattr(file, 'encoding', None) or encoding
+            metrics.incr('hostsmgr_bytes_written_total',
+                         sum(len(line.encode(encoding)) for line in lines))
 
     def saves(self):
         """Save to string with hosts file format
@@ -127,33 +342,116 @@ class HostsMgr(object):
         self.save(strio)
         return strio.getvalue()
 
-    def find(self, conditions, at_most=0):
-        """Find entries by provided condition
+    def export_hashdb(self, path, signature=None):
+        """Compile hosts entries into a constant hash database for fast
+        lookups, see hostsmgr.hashdb
+
+        :param path: The database file path
+        :type path: str
+        :param signature: Signature of the source hosts file, defaults to None
+        :type signature: str, optional
+        """
+
+        from . import hashdb
+
+        hashdb.export(self, path, signature)
+
+    def ifind(self, conditions, at_most=0):
+        """Find entries by provided condition lazily
+
+        Entries are matched while the returned generator is consumed, so
+        stopping early skips the rest of the hosts table and no list is built.
+        It's safe to remove entries (even the yielded one) from the hosts
+        table during the iteration.
 
         :param conditions: The entries must match this conditions
         :type conditions: conditions.Condition
         :param at_most: How much we will stop finding at most, defaults to 0
             means unlimited.
         :type at_most: int, optional
-        :return: A list of founded entries
-        :rtype: list
+        :return: A generator of founded entries
+        :rtype: generator
         """
 
         if isinstance(conditions, list):
             conditions = All(*conditions)
 
-        found_entries = []
+        if (self._prefilter is not None) and self._excluded(conditions):
+            if self._metrics is not None:
+                self._metrics.incr('hostsmgr_prefilter_skips_total')
+            return iter(())
+
+        if self._metrics is not None:
+            return self._ifind_measured(conditions, at_most)
+
+        return self._ifind(conditions, at_most)
+
+    iter_find = ifind
 
+    def _ifind(self, conditions, at_most):
+        found = 0
         for entry in self._entries:
             if not conditions(entry):
                 continue
 
-            found_entries.append(entry)
-            if (at_most >= 1) and (len(found_entries) >= at_most):
+            yield entry
+            found += 1
+            if (at_most >= 1) and (found >= at_most):
                 break
 
+    def _ifind_measured(self, conditions, at_most):
+        scanned = [0]
+
+        def counted(entry):
+            scanned[0] += 1
+            return conditions(entry)
+
+        found = 0
+        try:
+            for entry in self._ifind(counted, at_most):
+                found += 1
+                yield entry
+        finally:
+            # Also recorded if the consumer stopped early
+            self._metrics.incr('hostsmgr_find_scanned_total', scanned[0])
+            self._metrics.incr('hostsmgr_find_matched_total', found)
+
+    def find(self, conditions, at_most=0):
+        """Find entries by provided condition
+
+        :param conditions: The entries must match this conditions
+        :type conditions: conditions.Condition
+        :param at_most: How much we will stop finding at most, defaults to 0
+            means unlimited.
+        :type at_most: int, optional
+        :return: A list of founded entries
+        :rtype: list
+        """
+
+        metrics = self._metrics
+        if metrics is not None:
+            started = time.perf_counter()
+
+        found_entries = list(self.ifind(conditions, at_most))
+
+        if metrics is not None:
+            metrics.observe('hostsmgr_find_seconds',
+                            time.perf_counter() - started)
+
         return found_entries
 
+    def count(self, conditions):
+        """Count entries matched with provided condition without building a
+        list of them
+
+        :param conditions: The entries must match this conditions
+        :type conditions: conditions.Condition
+        :return: How many entries matched
+        :rtype: int
+        """
+
+        return sum(1 for _ in self.ifind(conditions))
+
     def check(self, conditions):
         """Check if there have any entry matched with provided condition
 
@@ -163,7 +461,10 @@ class HostsMgr(object):
         :rtype: bool
         """
 
-        return bool(self.find(conditions, at_most=1))
+        for _ in self.ifind(conditions, at_most=1):
+            return True
+
+        return False
 
     def add(self, hosts_entry, force=False):
         """Append the hosts entry to the end of hosts table
@@ -174,11 +475,17 @@ class HostsMgr(object):
         :type force: bool
         :raises ValueError: If there have any host same with one of provided
             hosts and force not equal to True.
+        :raises hostsmgr.exceptions.InvalidHostname: If the hosts table have a
+            normalizer and one of provided hosts is invalid.
         """
 
         if not hosts_entry.hosts:
             raise ValueError("HostsEntry's hosts must not empty!")
 
+        if self._normalizer is not None:
+            hosts_entry.hosts[:] = [
+                self._normalizer(h) for h in hosts_entry.hosts]
+
         if force:
             self.remove_hosts(hosts_entry.hosts)
         else:
@@ -196,6 +503,21 @@ class HostsMgr(object):
 
         # There nothing same with us, append one
         self._entries.append(hosts_entry)
+        self._prefilter_add(hosts_entry)
+
+    def extend(self, entries):
+        """Append entries to the end of hosts table in bulk
+
+        Unlike add(), entries are appended without looking for existing
+        hosts, so it's up to the caller to avoid duplicates.
+
+        :param entries: Entries to append
+        :type entries: iterable[hostsmgr.entries.Entry]
+        """
+
+        for entry in entries:
+            self._entries.append(entry)
+            self._prefilter_add(entry)
 
     def remove(self, entry):
         """Remove an entry that found by find() method
@@ -205,6 +527,60 @@ class HostsMgr(object):
         """
 
         self._entries.remove(entry)
+        if isinstance(entry, HostsEntry):
+            self._prefilter_discard(len(entry.hosts))
+
+    def insert_after(self, anchor, entry):
+        """Insert an entry right after another entry
+
+        :param anchor: An entry of the hosts table
+        :type anchor: hostsmgr.entries.Entry
+        :param entry: The new entry
+        :type entry: hostsmgr.entries.Entry
+        :raises ValueError: If anchor isn't in the hosts table or entry is
+            already in it
+        """
+
+        self._entries.insert_after(anchor, entry)
+        self._prefilter_add(entry)
+
+    def insert_before(self, anchor, entry):
+        """Insert an entry right before another entry
+
+        :param anchor: An entry of the hosts table
+        :type anchor: hostsmgr.entries.Entry
+        :param entry: The new entry
+        :type entry: hostsmgr.entries.Entry
+        :raises ValueError: If anchor isn't in the hosts table or entry is
+            already in it
+        """
+
+        self._entries.insert_before(anchor, entry)
+        self._prefilter_add(entry)
+
+    def move_after(self, anchor, entry):
+        """Move an entry right after another entry
+
+        :param anchor: An entry of the hosts table
+        :type anchor: hostsmgr.entries.Entry
+        :param entry: The entry to move
+        :type entry: hostsmgr.entries.Entry
+        :raises ValueError: If anchor or entry isn't in the hosts table
+        """
+
+        self._entries.move_after(anchor, entry)
+
+    def move_before(self, anchor, entry):
+        """Move an entry right before another entry
+
+        :param anchor: An entry of the hosts table
+        :type anchor: hostsmgr.entries.Entry
+        :param entry: The entry to move
+        :type entry: hostsmgr.entries.Entry
+        :raises ValueError: If anchor or entry isn't in the hosts table
+        """
+
+        self._entries.move_before(anchor, entry)
 
     def remove_hosts(self, hosts, at_most=0):
         """Remove hosts from entries
@@ -216,12 +592,17 @@ class HostsMgr(object):
         :type at_most: int, optional
         """
 
-        matched = self.find(Any(*[Host(h) for h in hosts]),
-                            at_most)
-        for entry in matched:
+        matched = False
+        removed = 0
+        if self._normalizer is not None:
+            hosts = [self._normalizer(h) for h in hosts]
+
+        for entry in self.ifind(Any(*[Host(h) for h in hosts]), at_most):
+            matched = True
             for host in hosts:
                 try:
                     entry.hosts.remove(host)
+                    removed += 1
                 except ValueError:
                     # Ignore value not found exception
                     pass
@@ -230,7 +611,8 @@ class HostsMgr(object):
             if len(entry.hosts) <= 0:
                 self._entries.remove(entry)
 
-        return bool(matched)
+        self._prefilter_discard(removed)
+        return matched
 
     def remove_by_inline_comment(self, ic_cond: InlineComment, at_most=0):
         """Remove entries by it's inline comment
@@ -245,8 +627,48 @@ class HostsMgr(object):
         :param at_most: int, optional
         """
 
-        matched = self.find(ic_cond, at_most)
-        for entry in matched:
+        matched = False
+        removed = 0
+        for entry in self.ifind(ic_cond, at_most):
+            matched = True
+            removed += len(entry.hosts)
             self._entries.remove(entry)
 
-        return bool(matched)
+        self._prefilter_discard(removed)
+        return matched
+
+    def dedupe(self):
+        """Remove duplicated hosts
+
+        A host which already mapped to the same address by a previous entry
+        will be removed, and entries that don't have any hosts left will be
+        removed as well.
+
+        :return: True if any host removed. Otherwise return False.
+        :rtype: bool
+        """
+
+        seen = set()
+        removed = 0
+        for entry in self._entries:
+            if not isinstance(entry, HostsEntry):
+                continue
+
+            hosts = []
+            for host in entry.hosts:
+                key = (entry.address, host)
+                if key not in seen:
+                    seen.add(key)
+                    hosts.append(host)
+
+            if len(hosts) == len(entry.hosts):
+                continue
+
+            removed += len(entry.hosts) - len(hosts)
+            if hosts:
+                entry.hosts[:] = hosts
+            else:
+                self._entries.remove(entry)
+
+        self._prefilter_discard(removed)
+        return removed > 0
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+"""Import domain blocklists into a hosts table
+
+Supported sources are plain domain lists (one domain per line, '#' starts a
+comment) and adblock style lists, where only plain ``||domain^`` rules could
+be expressed in a hosts file: exceptions, rules with options and other
+patterns are skipped.
+"""
+
+import time
+from .entries import HostsEntry
+from .exceptions import InvalidHostname
+from .conditions import HostsEntryFilter
+
+
+def parse_line(line):
+    """Get the domain of a blocklist line
+
+    :param line: A line of domain list or adblock list
+    :type line: str
+    :return: The domain (lowercase, without trailing dot), None if the line
+        doesn't block a domain
+    :rtype: str
+    """
+
+    line = line.strip()
+    if not line or line[0] in '#![':
+        return None
+
+    if line.startswith('||'):
+        if not line.endswith('^'):
+            return None
+        domain = line[2:-1]
+        if not domain or any(c in domain for c in '*/^$|'):
+            return None
+    elif line.startswith('@@'):
+        return None
+    else:
+        domain = line.split('#', 1)[0].strip()
+        if not domain or (len(domain.split()) != 1) or ('/' in domain):
+            return None
+
+    return domain.rstrip('.').lower() or None
+
+
+def parse_blocklist(lines):
+    """Get domains of blocklist lines lazily
+
+    :param lines: Lines of a domain list or adblock list
+    :type lines: iterable[str]
+    :return: A generator of domains
+    :rtype: generator
+    """
+
+    for line in lines:
+        domain = parse_line(line)
+        if domain is not None:
+            yield domain
+
+
+def _read_domains(path):
+    with open(path, 'r', encoding='utf-8', errors='replace') as source:
+        return list(parse_blocklist(source))
+
+
+class ImportReport(object):
+    """Statistics of an import
+    """
+
+    def __init__(self, sources, domains, added, elapsed, invalid=0):
+        #: Count of imported source files
+        self.sources = sources
+        #: Count of parsed domains, including duplicated and invalid ones
+        self.domains = domains
+        #: Count of appended entries
+        self.added = added
+        #: Seconds taken by the import
+        self.elapsed = elapsed
+        #: Count of domains rejected by the normalizer
+        self.invalid = invalid
+
+    @property
+    def duplicates(self):
+        return self.domains - self.added - self.invalid
+
+    @property
+    def rate(self):
+        """Parsed domains per second
+        """
+
+        return self.domains / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return ('%s(sources=%s, domains=%s, added=%s, duplicates=%s, '
+                'invalid=%s, elapsed=%.3f, rate=%.0f)' % (
+                    type(self).__name__, self.sources, self.domains,
+                    self.added, self.duplicates, self.invalid, self.elapsed,
+                    self.rate))
+
+
+def import_blocklists(mgr, paths, tag='blocklist', address='0.0.0.0',
+                      max_workers=None):
+    """Import blocklist files into a hosts table
+
+    The files are read on a thread pool, then every domain which isn't in the
+    hosts table yet (or imported from a previous file) is appended as a
+    ``<address> <domain> # <tag>`` entry in one bulk step, so the new block
+    could be replaced later with remove_by_inline_comment(). If the hosts
+    table have a normalizer, domains are normalized by it and the invalid
+    ones are skipped.
+
+    :param mgr: The hosts table
+    :type mgr: hostsmgr.HostsMgr
+    :param paths: Paths of blocklist files
+    :type paths: list[str]
+    :param tag: Inline comment of the appended entries, defaults to
+        'blocklist'
+    :type tag: str, optional
+    :param address: Address the domains mapped to, defaults to '0.0.0.0'
+    :type address: str, optional
+    :param max_workers: Count of threads reading files, defaults to None means
+        the ThreadPoolExecutor default
+    :type max_workers: int, optional
+    :return: The import statistics
+    :rtype: ImportReport
+    """
+
+    import ipaddress
+    from concurrent.futures import ThreadPoolExecutor
+
+    started = time.perf_counter()
+    # Parsed once, shared by all the new entries
+    address = ipaddress.ip_address(address)
+
+    seen = set()
+    for entry in mgr.ifind(HostsEntryFilter()):
+        seen.update(entry.hosts)
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        # Results in the order of paths, so the output is reproducible
+        results = list(executor.map(_read_domains, paths))
+
+    normalizer = mgr.normalizer
+    domains = 0
+    invalid = 0
+    new_entries = []
+    for source_domains in results:
+        domains += len(source_domains)
+        for domain in source_domains:
+            if normalizer is not None:
+                try:
+                    domain = normalizer(domain)
+                except InvalidHostname:
+                    invalid += 1
+                    continue
+
+            if domain not in seen:
+                seen.add(domain)
+                new_entries.append(HostsEntry(address, [domain], tag))
+
+    mgr.extend(new_entries)
+    return ImportReport(len(paths), domains, len(new_entries),
+                        time.perf_counter() - started, invalid)
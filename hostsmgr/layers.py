@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+"""Compose one hosts table from several hosts files (layers)
+"""
+
+import os
+import hashlib
+from .hostsmgr import HostsMgr
+from .entries import HostsEntry, CommentEntry
+
+
+class Layer(object):
+    """A hosts file mounted into LayeredHostsMgr
+
+    A missing file is treated as an empty layer, so fragments could be
+    removed and added back later.
+    """
+
+    def __init__(self, path, priority, name, order):
+        self.path = path
+        self.priority = priority
+        self.name = name
+        self.order = order
+        self.mgr = HostsMgr()
+
+        self._signature = None
+        self._digest = None
+
+    def refresh(self):
+        """Reload the file if it changed
+
+        The file is only read if it's stat (mtime, size, inode) changed, and
+        only parsed again if it's content hash changed as well.
+
+        :return: True if the layer's entries changed
+        :rtype: bool
+        """
+
+        try:
+            st = os.stat(self.path)
+            signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            signature = None
+
+        if (self._digest is not None) and (signature == self._signature):
+            return False
+
+        content = b''
+        if signature is not None:
+            with open(self.path, 'rb') as hosts_file:
+                content = hosts_file.read()
+
+        self._signature = signature
+        digest = hashlib.sha1(content).hexdigest()
+        if digest == self._digest:
+            return False
+
+        self._digest = digest
+        self.mgr.loads(content.decode('utf-8'))
+        return True
+
+
+class LayeredHostsMgr(object):
+    """Hosts table merged from several mounted hosts files
+
+    Each hostname is resolved by the layer with the highest priority that
+    contains it (among layers with the same priority, the one mounted later
+    wins), lower layers lose their mappings of that hostname. The merged
+    table lists layers from the highest priority to the lowest.
+
+    The merged view is cached: refresh() only reloads layers whose files
+    changed, and merges again only if any layer changed.
+
+    :param headers: Insert a comment naming each layer into the merged table,
+        defaults to True
+    :type headers: bool, optional
+    """
+
+    def __init__(self, headers=True):
+        self._headers = headers
+        self._layers = []
+        self._mount_count = 0
+        self._merged = None
+
+    @property
+    def layers(self):
+        """Mounted layers, from the highest priority to the lowest
+
+        :rtype: list[Layer]
+        """
+
+        return sorted(self._layers, key=lambda layer: (
+            layer.priority, layer.order), reverse=True)
+
+    def mount(self, path, priority=0, name=None):
+        """Mount a hosts file as a layer
+
+        :param path: The hosts file path
+        :type path: str
+        :param priority: Higher priority layers win conflicts, defaults to 0
+        :type priority: int, optional
+        :param name: Layer name, defaults to the path
+        :type name: str, optional
+        :raises ValueError: If a layer with the same name mounted already
+        :return: The mounted layer
+        :rtype: Layer
+        """
+
+        if name is None:
+            name = path
+
+        if any(layer.name == name for layer in self._layers):
+            raise ValueError('Layer mounted already : %s' % name)
+
+        layer = Layer(path, priority, name, self._mount_count)
+        self._mount_count += 1
+        layer.refresh()
+        self._layers.append(layer)
+        self._merged = None
+        return layer
+
+    def mount_directory(self, directory, priority=0):
+        """Mount every regular file of a hosts.d style directory, in name
+        order, so files sorted later win conflicts with the same priority
+
+        :param directory: The directory path
+        :type directory: str
+        :param priority: Priority of all mounted layers, defaults to 0
+        :type priority: int, optional
+        :return: The mounted layers
+        :rtype: list[Layer]
+        """
+
+        layers = []
+        for filename in sorted(os.listdir(directory)):
+            path = os.path.join(directory, filename)
+            if filename.startswith('.') or not os.path.isfile(path):
+                continue
+
+            layers.append(self.mount(path, priority))
+
+        return layers
+
+    def unmount(self, name):
+        """Unmount a layer
+
+        :param name: The layer name
+        :type name: str
+        :raises ValueError: If no such layer
+        """
+
+        for layer in self._layers:
+            if layer.name == name:
+                self._layers.remove(layer)
+                self._merged = None
+                return
+
+        raise ValueError('Layer not mounted : %s' % name)
+
+    def refresh(self):
+        """Reload the layers whose files changed
+
+        :return: Names of changed layers
+        :rtype: list[str]
+        """
+
+        changed = [layer.name for layer in self._layers if layer.refresh()]
+        if changed:
+            self._merged = None
+
+        return changed
+
+    def merged(self, refresh=True):
+        """Get the merged hosts table
+
+        The returned table is shared until any layer changed, don't modify
+        it.
+
+        :param refresh: Check layers for changes first, defaults to True
+        :type refresh: bool, optional
+        :rtype: HostsMgr
+        """
+
+        if refresh:
+            self.refresh()
+
+        if self._merged is None:
+            self._merged = self._merge()
+
+        return self._merged
+
+    def _merge(self):
+        merged = HostsMgr()
+        entries = merged._entries
+        claimed = set()
+
+        for layer in self.layers:
+            if self._headers:
+                entries.append(CommentEntry(
+                    ' layer: %s (priority %s)' % (layer.name, layer.priority)))
+
+            layer_hosts = set()
+            for entry in layer.mgr._entries:
+                if not isinstance(entry, HostsEntry):
+                    entries.append(entry)
+                    continue
+
+                hosts = [h for h in entry.hosts if h not in claimed]
+                layer_hosts.update(hosts)
+                if hosts:
+                    entries.append(
+                        HostsEntry(entry.address, hosts, entry.comment))
+
+            # Hosts of this layer are claimed only after the whole layer, so
+            # a layer could map a host to several addresses
+            claimed |= layer_hosts
+
+        return merged
+
+    def save(self, file, atomic=False):
+        """Save the merged hosts table to file
+
+        :param file: The opened file object (should open with write text mode)
+            or str path to hosts file
+        :type file: str or file object
+        :param atomic: See HostsMgr.save(), defaults to False
+        :type atomic: bool, optional
+        """
+
+        self.merged().save(file, atomic=atomic)
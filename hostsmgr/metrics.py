@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+"""Opt-in counters and timing histograms for HostsMgr operations
+"""
+
+import time
+import logging
+import threading
+import contextlib
+from collections import OrderedDict
+
+#: Default histogram buckets (in seconds) for the timing metrics
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0,
+                   10.0)
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels_key, extra=()):
+    pairs = list(labels_key) + list(extra)
+    if not pairs:
+        return ''
+
+    return '{%s}' % ','.join(
+        '%s="%s"' % (k, str(v).replace('\\', r'\\').replace('"', r'\"'))
+        for k, v in pairs)
+
+
+class Histogram(object):
+    """A cumulative histogram with fixed buckets
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class LoggingSink(object):
+    """A sink which write every metric event to a logger
+
+    :param logger: The logger to write to, defaults to the 'hostsmgr.metrics'
+        logger
+    :type logger: logging.Logger, optional
+    :param level: The logging level, defaults to logging.DEBUG
+    :type level: int, optional
+    """
+
+    def __init__(self, logger=None, level=logging.DEBUG):
+        if logger is None:
+            logger = logging.getLogger('hostsmgr.metrics')
+
+        self._logger = logger
+        self._level = level
+
+    def __call__(self, kind, name, value, labels):
+        self._logger.log(self._level, '%s %s%s %s', kind, name,
+                         _format_labels(_labels_key(labels)), value)
+
+
+class Metrics(object):
+    """Metrics registry that collect counters and timing histograms
+
+    Pass an instance to HostsMgr(metrics=...) to enable instrumentation, a
+    HostsMgr without metrics only pay for a single None check per operation.
+
+    Sinks are callables with signature ``sink(kind, name, value, labels)``,
+    kind is 'counter' or 'timing'. They are called on every recorded event.
+
+    :param sinks: Initial sinks, defaults to None
+    :type sinks: list[callable], optional
+    :param buckets: Histogram buckets in seconds, defaults to DEFAULT_BUCKETS
+    :type buckets: tuple[float], optional
+    """
+
+    def __init__(self, sinks=None, buckets=DEFAULT_BUCKETS):
+        self._sinks = list(sinks or [])
+        self._buckets = buckets
+        self._counters = OrderedDict()
+        self._histograms = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink):
+        """Add a sink that receive every recorded event
+
+        :param sink: A callable ``sink(kind, name, value, labels)``
+        :type sink: callable
+        """
+
+        self._sinks.append(sink)
+
+    def remove_sink(self, sink):
+        self._sinks.remove(sink)
+
+    def incr(self, name, value=1, **labels):
+        """Increase a counter
+
+        :param name: The counter name
+        :type name: str
+        :param value: How much to increase, defaults to 1
+        :type value: int, optional
+        """
+
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+        for sink in self._sinks:
+            sink('counter', name, value, labels)
+
+    def observe(self, name, value, **labels):
+        """Record a timing (in seconds) into a histogram
+
+        :param name: The histogram name
+        :type name: str
+        :param value: Elapsed seconds
+        :type value: float
+        """
+
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = Histogram(self._buckets)
+                self._histograms[key] = histogram
+            histogram.observe(value)
+
+        for sink in self._sinks:
+            sink('timing', name, value, labels)
+
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        """Context manager that observe the elapsed time of it's block
+        """
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def counter(self, name, **labels):
+        """Get current value of a counter
+
+        :return: The counter value, 0 if never recorded
+        :rtype: int
+        """
+
+        return self._counters.get((name, _labels_key(labels)), 0)
+
+    def histogram(self, name, **labels):
+        """Get a histogram
+
+        :return: The histogram, None if never recorded
+        :rtype: Histogram
+        """
+
+        return self._histograms.get((name, _labels_key(labels)))
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def dump_prometheus(self):
+        """Dump all metrics in Prometheus text exposition format
+
+        :return: Prometheus text format string
+        :rtype: str
+        """
+
+        # Series of one metric family must be written together, so group
+        # them by name while keeping the first seen order of the names
+        families = OrderedDict()
+        with self._lock:
+            for (name, labels_key), value in self._counters.items():
+                families.setdefault(name, ('counter', []))[1].append(
+                    (labels_key, value))
+            for (name, labels_key), hist in self._histograms.items():
+                families.setdefault(name, ('histogram', []))[1].append(
+                    (labels_key, hist))
+
+            lines = []
+            for name, (kind, series) in families.items():
+                lines.append('# TYPE %s %s' % (name, kind))
+                for labels_key, value in series:
+                    if kind == 'counter':
+                        lines.append('%s%s %s' % (
+                            name, _format_labels(labels_key), value))
+                    else:
+                        lines.extend(
+                            self._histogram_lines(name, labels_key, value))
+
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    @staticmethod
+    def _histogram_lines(name, labels_key, hist):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(hist.buckets, hist.counts):
+            cumulative += count
+            lines.append('%s_bucket%s %s' % (
+                name, _format_labels(labels_key, [('le', bound)]),
+                cumulative))
+        lines.append('%s_bucket%s %s' % (
+            name, _format_labels(labels_key, [('le', '+Inf')]), hist.count))
+        lines.append('%s_sum%s %s' % (
+            name, _format_labels(labels_key), hist.sum))
+        lines.append('%s_count%s %s' % (
+            name, _format_labels(labels_key), hist.count))
+        return lines
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""Hostname normalization and validation
+"""
+
+import functools
+from .exceptions import InvalidHostname
+
+_LABEL_CHARS = frozenset('abcdefghijklmnopqrstuvwxyz0123456789-')
+
+
+def normalize_hostname(name):
+    """Normalize a hostname
+
+    The trailing dot is removed, the name is lowercased, internationalized
+    names are encoded by IDNA (to their 'xn--' form), then validated by
+    RFC 1123: at most 253 characters, dot separated labels of 1 to 63
+    letters, digits or hyphens, which don't start or end with a hyphen.
+
+    :param name: The hostname
+    :type name: str
+    :raises InvalidHostname: If the name isn't a valid hostname
+    :return: The normalized hostname
+    :rtype: str
+    """
+
+    normalized = name[:-1] if name.endswith('.') else name
+    normalized = normalized.lower()
+    try:
+        normalized.encode('ascii')
+    except UnicodeError:
+        try:
+            normalized = normalized.encode('idna').decode('ascii')
+        except UnicodeError:
+            raise InvalidHostname('Invalid IDNA hostname : %r' % name)
+
+    if not 0 < len(normalized) <= 253:
+        raise InvalidHostname('Invalid hostname length : %r' % name)
+
+    for label in normalized.split('.'):
+        if (not 0 < len(label) <= 63) or (
+                label[0] == '-') or (label[-1] == '-') or (
+                not _LABEL_CHARS.issuperset(label)):
+            raise InvalidHostname('Invalid hostname : %r' % name)
+
+    return normalized
+
+
+class Normalizer(object):
+    """Hostname normalizer with a bounded LRU cache keyed by the raw name,
+    so names repeated in big lists are normalized only once
+
+    Invalid names are not cached, they raise InvalidHostname every time.
+
+    :param maxsize: Count of cached names, defaults to 65536
+    :type maxsize: int, optional
+    """
+
+    def __init__(self, maxsize=65536):
+        self._normalize = functools.lru_cache(maxsize)(normalize_hostname)
+
+    def __call__(self, name):
+        """Normalize a hostname, see normalize_hostname()
+        """
+
+        return self._normalize(name)
+
+    def cache_info(self):
+        return self._normalize.cache_info()
+
+    def cache_clear(self):
+        self._normalize.cache_clear()
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+"""Serializable operations that could be applied to a HostsMgr
+
+An operation is a dict with an 'op' key and the operation's arguments, so it
+could be read from JSON or from a simple text line:
+
+============  ==========================================  ====================
+op            JSON arguments                              Text form
+============  ==========================================  ====================
+add           address, hosts, comment (opt), force (opt)  add ADDR HOST... [#C]
+remove        hosts                                       remove HOST...
+remove-tag    tag, partial (opt)                          remove-tag [#]TAG
+query         host or address                             query HOST_OR_ADDR
+dedupe                                                    dedupe
+============  ==========================================  ====================
+"""
+
+import json
+import ipaddress
+from .entries import HostsEntry
+from .conditions import IPAddress, Host, InlineComment
+from .exceptions import InvalidFormat
+from ._compat import string_types
+
+#: Operations which modify the hosts table
+MUTATING_OPERATIONS = frozenset(['add', 'remove', 'remove-tag', 'dedupe'])
+
+OPERATIONS = MUTATING_OPERATIONS | frozenset(['query'])
+
+
+def parse_operation(line):
+    """Parse an operation from a JSON object or a text line
+
+    :param line: A JSON object string or a text form operation
+    :type line: str
+    :raises InvalidFormat: If the line isn't a valid operation
+    :return: The operation dict
+    :rtype: dict
+    """
+
+    line = line.strip()
+    if line.startswith('{'):
+        try:
+            op = json.loads(line)
+        except ValueError as e:
+            raise InvalidFormat('Invalid JSON operation : %s' % e)
+
+        if not isinstance(op, dict):
+            raise InvalidFormat('Operation must be a JSON object : %s' % line)
+    else:
+        op = _parse_text_operation(line)
+
+    validate_operation(op)
+    return op
+
+
+def _parse_text_operation(line):
+    comment = None
+    if '#' in line:
+        line, comment = line.split('#', 1)
+
+    parts = line.split()
+    if not parts:
+        raise InvalidFormat('Empty operation!')
+
+    name, args = parts[0], parts[1:]
+    if name == 'add':
+        if len(args) < 2:
+            raise InvalidFormat('Usage: add ADDRESS HOST [HOST ...] [#TAG]')
+
+        op = {'op': name, 'address': args[0], 'hosts': args[1:]}
+        if comment is not None:
+            op['comment'] = comment
+        return op
+    elif name == 'remove':
+        return {'op': name, 'hosts': args}
+    elif name == 'remove-tag':
+        # Both "remove-tag TAG" and "remove-tag #TAG" are accepted
+        return {'op': name, 'tag': ' '.join(args) if args else comment}
+    elif name == 'query':
+        if len(args) != 1:
+            raise InvalidFormat('Usage: query HOST_OR_ADDRESS')
+
+        try:
+            ipaddress.ip_address(args[0])
+            return {'op': name, 'address': args[0]}
+        except ValueError:
+            return {'op': name, 'host': args[0]}
+    elif name == 'dedupe':
+        return {'op': name}
+
+    raise InvalidFormat('Unknown operation : %s' % name)
+
+
+def validate_operation(op):
+    """Check an operation's name and required arguments
+
+    :param op: The operation dict
+    :type op: dict
+    :raises InvalidFormat: If the operation isn't valid
+    """
+
+    name = op.get('op')
+    if name not in OPERATIONS:
+        raise InvalidFormat('Unknown operation : %s' % name)
+
+    required = {
+        'add': ['address', 'hosts'],
+        'remove': ['hosts'],
+        'remove-tag': ['tag'],
+    }.get(name, [])
+    for key in required:
+        if not op.get(key):
+            raise InvalidFormat("Operation '%s' requires '%s'" % (name, key))
+
+    if name == 'query' and not (op.get('host') or op.get('address')):
+        raise InvalidFormat("Operation 'query' requires 'host' or 'address'")
+
+    hosts = op.get('hosts')
+    if hosts is not None and not (
+            isinstance(hosts, list) and
+            all(isinstance(h, string_types) and h for h in hosts)):
+        raise InvalidFormat(
+            "Operation '%s' requires 'hosts' to be a list of str" % name)
+
+    for key in ['address', 'host', 'tag', 'comment']:
+        value = op.get(key)
+        if value is not None and not isinstance(value, string_types):
+            raise InvalidFormat(
+                "Operation '%s' requires '%s' to be a str" % (name, key))
+
+    for key in ['force', 'partial']:
+        value = op.get(key)
+        if value is not None and not isinstance(value, bool):
+            raise InvalidFormat(
+                "Operation '%s' requires '%s' to be a bool" % (name, key))
+
+
+def apply_operation(mgr, op, force=False):
+    """Apply an operation to a hosts manager
+
+    :param mgr: The hosts manager
+    :type mgr: hostsmgr.HostsMgr
+    :param op: The operation dict
+    :type op: dict
+    :param force: Default value of the 'force' argument of 'add' operations,
+        defaults to False
+    :type force: bool, optional
+    :return: Matched entries for 'query', otherwise whether the hosts table
+        changed
+    :rtype: list or bool
+    """
+
+    validate_operation(op)
+
+    name = op['op']
+    if name == 'add':
+        mgr.add(HostsEntry(op['address'], list(op['hosts']),
+                           op.get('comment')),
+                force=op.get('force', force))
+        return True
+    elif name == 'remove':
+        return mgr.remove_hosts(list(op['hosts']))
+    elif name == 'remove-tag':
+        return mgr.remove_by_inline_comment(
+            InlineComment(op['tag'], partial=op.get('partial', False)))
+    elif name == 'query':
+        if op.get('address'):
+            return mgr.find(IPAddress(op['address']))
+        return mgr.find(Host(op['host']))
+    elif name == 'dedupe':
+        return mgr.dedupe()
+
+
+def entry_to_dict(entry):
+    """Convert a hosts entry to a JSON serializable dict
+    """
+
+    return {
+        'address': entry.address.compressed,
+        'hosts': list(entry.hosts),
+        'comment': entry.comment,
+    }
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+"""Hosts table shared by many processes through a memory mapped snapshot
+
+A parent process parses the hosts file once and publishes the table as a
+hash database snapshot (see hostsmgr.hashdb). Workers map the snapshot read
+only, so all of them share the same pages of the OS page cache instead of
+parsing and holding their own copy. Publishing again replaces the snapshot
+file atomically with the next generation, and workers switch to it on
+refresh, while lookups already running finish on the old mapping.
+"""
+
+import os
+import time
+from .hashdb import HashDB, export
+
+
+def publish(mgr, path):
+    """Publish a hosts table as the next generation of a snapshot
+
+    :param mgr: The hosts table
+    :type mgr: hostsmgr.HostsMgr
+    :param path: The snapshot file path
+    :type path: str
+    :return: The published generation number
+    :rtype: int
+    """
+
+    generation = 1
+    if os.path.exists(path):
+        with HashDB(path) as db:
+            generation = (db.generation or 0) + 1
+
+    export(mgr, path, generation=generation)
+    return generation
+
+
+class SharedHostsTable(object):
+    """Read only view of a published snapshot
+
+    :param path: The snapshot file path
+    :type path: str
+    :param check_interval: Seconds between checks for a new generation during
+        lookups, 0 checks on every lookup, None only checks by refresh(),
+        defaults to 1.0
+    :type check_interval: float, optional
+    """
+
+    def __init__(self, path, check_interval=1.0):
+        self._path = path
+        self._check_interval = check_interval
+        self._db = HashDB(path)
+        self._checked = time.monotonic()
+
+    @property
+    def generation(self):
+        return self._db.generation
+
+    def refresh(self):
+        """Switch to the current snapshot if a new generation published
+
+        The old mapping isn't closed here, it's released once no lookup uses
+        it any more.
+
+        :return: True if switched to a new generation
+        :rtype: bool
+        """
+
+        self._checked = time.monotonic()
+        try:
+            st = os.stat(self._path)
+        except OSError:
+            # Being replaced or removed, keep the current generation
+            return False
+
+        if (st.st_dev, st.st_ino) == self._db.identity:
+            return False
+
+        self._db = HashDB(self._path)
+        return True
+
+    def _current(self):
+        interval = self._check_interval
+        if (interval is not None) and (
+                time.monotonic() - self._checked >= interval):
+            self.refresh()
+
+        return self._db
+
+    def addresses(self, host):
+        """Get the addresses of a hostname
+
+        :rtype: list[str]
+        """
+
+        return self._current().addresses(host)
+
+    def hosts(self, address):
+        """Get the hostnames of an address
+
+        :rtype: list[str]
+        """
+
+        return self._current().hosts(address)
+
+    def resolve(self, host):
+        """Resolve a hostname to it's first address
+
+        :param host: The hostname
+        :type host: str
+        :return: The address, None if not found
+        :rtype: str
+        """
+
+        addresses = self._current().addresses(host)
+        return addresses[0] if addresses else None
+
+    def find(self, conditions):
+        """Find hosts entries by conditions, see hashdb.HashDB.find()
+        """
+
+        return self._current().find(conditions)
+
+    def check(self, conditions):
+        return self._current().check(conditions)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+"""Ordered entry storage with O(1) remove, insert and move
+"""
+
+
+class _Node(object):
+    __slots__ = ('prev', 'next', 'entry', 'removed')
+
+    def __init__(self, entry=None):
+        self.prev = self
+        self.next = self
+        self.entry = entry
+        self.removed = False
+
+
+class EntryList(object):
+    """An ordered collection of entries backed by a doubly linked list
+
+    The entries themselves are the handles: an index keyed by entry identity
+    maps each entry to it's node, so removing an entry, inserting next to an
+    entry or moving an entry don't need to search or shift the others.
+    Iteration keeps the file order.
+
+    Iterating is safe while entries are removed: a removed entry is never
+    yielded afterwards, and the iteration continues with the entries after
+    it. Entries inserted or moved during an iteration may or may not be
+    visited.
+
+    :param entries: Initial entries, defaults to empty
+    :type entries: iterable, optional
+    """
+
+    def __init__(self, entries=()):
+        self._root = _Node()
+        self._nodes = {}
+        self.extend(entries)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __bool__(self):
+        return bool(self._nodes)
+
+    def __contains__(self, entry):
+        return id(entry) in self._nodes
+
+    def __iter__(self):
+        root = self._root
+        node = root.next
+        while node is not root:
+            if not node.removed:
+                yield node.entry
+            node = node.next
+
+    def __reversed__(self):
+        root = self._root
+        node = root.prev
+        while node is not root:
+            if not node.removed:
+                yield node.entry
+            node = node.prev
+
+    def __getitem__(self, index):
+        """Get entry by position, O(n), prefer iteration
+        """
+
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('EntryList index out of range')
+
+        # Walk from the nearer end
+        if index < size // 2:
+            iterator, steps = iter(self), index
+        else:
+            iterator, steps = reversed(self), size - 1 - index
+
+        for i, entry in enumerate(iterator):
+            if i == steps:
+                return entry
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, list(self))
+
+    def _node(self, entry):
+        try:
+            return self._nodes[id(entry)]
+        except KeyError:
+            raise ValueError('Entry not in the hosts table : %r' % entry)
+
+    def _link(self, node, prev):
+        # Link node right after prev
+        if id(node.entry) in self._nodes:
+            raise ValueError(
+                'Entry already in the hosts table : %r' % node.entry)
+
+        node.prev = prev
+        node.next = prev.next
+        prev.next.prev = node
+        prev.next = node
+        self._nodes[id(node.entry)] = node
+
+    def _unlink(self, node):
+        # Keep node.next, so iterators standing on it could go on
+        node.prev.next = node.next
+        node.next.prev = node.prev
+        del self._nodes[id(node.entry)]
+
+    def append(self, entry):
+        self._link(_Node(entry), self._root.prev)
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def insert_after(self, anchor, entry):
+        """Insert entry right after anchor
+
+        :raises ValueError: If anchor not in the list or entry already in it
+        """
+
+        self._link(_Node(entry), self._node(anchor))
+
+    def insert_before(self, anchor, entry):
+        """Insert entry right before anchor
+
+        :raises ValueError: If anchor not in the list or entry already in it
+        """
+
+        self._link(_Node(entry), self._node(anchor).prev)
+
+    def remove(self, entry):
+        """Remove an entry
+
+        :raises ValueError: If entry not in the list
+        """
+
+        node = self._node(entry)
+        self._unlink(node)
+        node.removed = True
+
+    def _check_move(self, anchor, entry):
+        self._node(anchor)
+        self._node(entry)
+        if anchor is entry:
+            raise ValueError('Could not move an entry next to itself!')
+
+    def move_after(self, anchor, entry):
+        """Move entry right after anchor
+
+        :raises ValueError: If anchor or entry not in the list
+        """
+
+        self._check_move(anchor, entry)
+        self.remove(entry)
+        self.insert_after(anchor, entry)
+
+    def move_before(self, anchor, entry):
+        """Move entry right before anchor
+
+        :raises ValueError: If anchor or entry not in the list
+        """
+
+        self._check_move(anchor, entry)
+        self.remove(entry)
+        self.insert_before(anchor, entry)
+
+    def clear(self):
+        for node in self._nodes.values():
+            node.removed = True
+
+        self._nodes.clear()
+        self._root.prev = self._root
+        self._root.next = self._root
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+"""Thread-safe hosts manager guarded by a reader-writer lock
+"""
+
+import threading
+import functools
+import contextlib
+from .hostsmgr import HostsMgr
+
+
+class RWLock(object):
+    """A reentrant, phase fair reader-writer lock
+
+    Any number of readers could hold the lock together, while a writer holds
+    it exclusively. Waiting writers block new readers, so a busy read load
+    could not starve writers, and readers that are waiting when a writer
+    releases the lock go before the next writer, so back to back writers
+    could not starve readers. A thread holding the lock could acquire it again
+    for reading or writing (a reader could not upgrade to writer).
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._waiting_writers = 0
+        self._waiting_readers = 0
+        # Set when a writer released the lock while readers were waiting
+        self._readers_turn = False
+        self._local = threading.local()
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+
+            depth = getattr(self._local, 'depth', 0)
+            if depth == 0:
+                self._waiting_readers += 1
+                try:
+                    while (self._writer is not None) or (
+                            self._waiting_writers and not self._readers_turn):
+                        self._cond.wait()
+                finally:
+                    self._waiting_readers -= 1
+                    if self._waiting_readers == 0:
+                        self._readers_turn = False
+                        self._cond.notify_all()
+                self._readers += 1
+            self._local.depth = depth + 1
+
+    def release_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth -= 1
+                return
+
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+
+            if getattr(self._local, 'depth', 0):
+                raise RuntimeError(
+                    'Could not upgrade read lock to write lock!')
+
+            self._waiting_writers += 1
+            try:
+                while ((self._writer is not None) or self._readers or
+                       self._readers_turn):
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self):
+        with self._cond:
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._writer = None
+                if self._waiting_readers:
+                    self._readers_turn = True
+                self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def reading(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextlib.contextmanager
+    def writing(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+def _reading(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.reading():
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _writing(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.writing():
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class ThreadSafeHostsMgr(HostsMgr):
+    """Hosts manager that could be shared between threads
+
+    Lookups run concurrently, while modifications are exclusive, so readers
+    never see a half modified hosts table. Use the lock property to group
+    several calls into one atomic step::
+
+        with mgr.lock.writing():
+            mgr.remove_by_inline_comment(InlineComment('dev'))
+            mgr.add(HostsEntry('10.0.0.1', ['db'], 'dev'))
+
+    Entries returned by find() are shared with the hosts table, don't modify
+    them without holding the write lock.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._lock = RWLock()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def lock(self):
+        return self._lock
+
+    def ifind(self, conditions, at_most=0):
+        """Find entries by provided condition lazily
+
+        A read lock can't be held across the yields (the consumer may modify
+        the hosts table meanwhile), so the matched entries are collected
+        under the lock first and then iterated.
+        """
+
+        with self._lock.reading():
+            return iter(list(HostsMgr.ifind(self, conditions, at_most)))
+
+    iter_find = ifind
+
+    save = _reading(HostsMgr.save)
+    saves = _reading(HostsMgr.saves)
+    find = _reading(HostsMgr.find)
+    check = _reading(HostsMgr.check)
+    count = _reading(HostsMgr.count)
+
+    clear = _writing(HostsMgr.clear)
+    load = _writing(HostsMgr.load)
+    loads = _writing(HostsMgr.loads)
+    add = _writing(HostsMgr.add)
+    extend = _writing(HostsMgr.extend)
+    remove = _writing(HostsMgr.remove)
+    insert_after = _writing(HostsMgr.insert_after)
+    insert_before = _writing(HostsMgr.insert_before)
+    move_after = _writing(HostsMgr.move_after)
+    move_before = _writing(HostsMgr.move_before)
+    remove_hosts = _writing(HostsMgr.remove_hosts)
+    remove_by_inline_comment = _writing(HostsMgr.remove_by_inline_comment)
+    dedupe = _writing(HostsMgr.dedupe)
+    rebuild_prefilter = _writing(HostsMgr.rebuild_prefilter)
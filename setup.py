@@ -36,6 +36,11 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     install_requires=install_requires,
+    entry_points={
+        'console_scripts': [
+            'hostsmgr=hostsmgr.cli:main',
+        ],
+    },
     license="Apache Software License",
     zip_safe=False,
     keywords='hosts,hostsmgr',
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `hostsmgr.batch` module."""
+
+import os
+import pytest
+from hostsmgr.batch import apply_plan, FileResult
+from hostsmgr.exceptions import InvalidFormat
+
+PLAN = [
+    'remove-tag dev',
+    {'op': 'add', 'address': '10.0.0.1', 'hosts': ['db'], 'comment': 'dev'},
+]
+
+
+def test_apply_plan(tmpdir):
+    changed = tmpdir.join('changed')
+    changed.write("127.0.0.1 localhost\n10.0.0.9 db #dev\n")
+    unchanged = tmpdir.join('unchanged')
+    unchanged.write("127.0.0.1\tlocalhost\n10.0.0.1\tdb #dev\n")
+    os.utime(str(unchanged), ns=(0, 12345))
+    broken = tmpdir.join('broken')
+    broken.write_binary(b'\xff\xfe')
+    missing = tmpdir.join('missing')
+
+    paths = [str(p) for p in (changed, unchanged, broken, missing)]
+    results = apply_plan(paths, PLAN, max_workers=2)
+
+    assert [r.path for r in results] == paths
+    assert [r.status for r in results] == [
+        FileResult.CHANGED, FileResult.UNCHANGED, FileResult.ERROR,
+        FileResult.ERROR]
+    assert [r.ok for r in results] == [True, True, False, False]
+    assert 'UnicodeDecodeError' in results[2].error
+    assert results[0].sha256 == results[1].sha256
+
+    assert changed.read() == unchanged.read()
+    # Not rewritten
+    assert os.stat(str(unchanged)).st_mtime_ns == 12345
+    assert broken.read_binary() == b'\xff\xfe'
+
+
+def test_invalid_plan(tmpdir):
+    path = tmpdir.join('hosts')
+    path.write("127.0.0.1 localhost\n")
+
+    for plan in [['query localhost'], ['unknown'], [{'op': 'remove'}]]:
+        with pytest.raises(InvalidFormat):
+            apply_plan([str(path)], plan)
+
+    assert apply_plan([], PLAN) == []
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `hostsmgr.bloom` module."""
+
+import pytest
+from hostsmgr import HostsMgr
+from hostsmgr.bloom import BloomFilter
+from hostsmgr.entries import HostsEntry
+from hostsmgr.metrics import Metrics
+from hostsmgr.conditions import Host, IPAddress, InlineComment
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(1000, 0.01)
+    for i in range(1000):
+        bloom.add('host%s' % i)
+
+    assert len(bloom) == 1000
+    assert all('host%s' % i in bloom for i in range(1000))
+    false_positives = sum('other%s' % i in bloom for i in range(10000))
+    assert false_positives < 300
+    # About 9.6 bits per key for 1%
+    assert 1100 < bloom.memory < 1300
+
+    with pytest.raises(ValueError):
+        BloomFilter(0)
+    with pytest.raises(ValueError):
+        BloomFilter(10, 1.5)
+
+
+def test_prefilter_skips_missing_hosts():
+    metrics = Metrics()
+    mgr = HostsMgr(metrics=metrics, prefilter=0.001)
+    mgr.loads("127.0.0.1 localhost\n10.0.0.1 db\n")
+    assert HostsMgr().prefilter is None
+    assert len(mgr.prefilter) == 2
+
+    assert mgr.check(Host('db'))
+    assert not mgr.check(Host('missing'))
+    assert not mgr.check(IPAddress('10.0.0.1') & Host('missing'))
+    assert metrics.counter('hostsmgr_prefilter_skips_total') == 2
+    assert metrics.counter('hostsmgr_find_scanned_total') == 2
+
+    mgr.add(HostsEntry('10.0.0.2', ['web'], 'dev'))
+    assert mgr.check(Host('web'))
+
+
+def test_prefilter_rebuilt_after_removals():
+    mgr = HostsMgr(prefilter=0.01)
+    mgr.loads(''.join('10.0.0.1 host%s\n' % i for i in range(10)))
+    for i in range(10):
+        mgr.add(HostsEntry('10.0.0.2', ['tagged%s' % i], 'tag'))
+    assert len(mgr.prefilter) == 20
+
+    mgr.remove_by_inline_comment(InlineComment('tag'))
+    assert len(mgr.prefilter) == 20
+    mgr.remove_hosts(['host0'])
+    assert len(mgr.prefilter) == 9
+    assert not mgr.check(Host('host0'))
+    assert mgr.check(Host('host1'))
+
+    mgr.clear()
+    assert len(mgr.prefilter) == 0
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `hostsmgr.cli` module."""
+
+import io
+import json
+import pytest
+from hostsmgr.cli import main
+from hostsmgr.operations import parse_operation
+from hostsmgr.exceptions import InvalidFormat
+
+
+@pytest.fixture
+def hosts_path(tmpdir):
+    path = tmpdir.join('hosts')
+    path.write("127.0.0.1\tlocalhost\n")
+    return str(path)
+
+
+def run(argv, stdin=''):
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    status = main(argv, io.StringIO(stdin), stdout, stderr)
+    return status, stdout.getvalue(), stderr.getvalue()
+
+
+def test_parse_operation():
+    assert parse_operation('add 10.0.0.1 a b #tag') == {
+        'op': 'add', 'address': '10.0.0.1', 'hosts': ['a', 'b'],
+        'comment': 'tag'}
+    assert parse_operation('remove-tag #tag') == {
+        'op': 'remove-tag', 'tag': 'tag'}
+    assert parse_operation('query ::1') == {'op': 'query', 'address': '::1'}
+    assert parse_operation('{"op": "remove", "hosts": ["a"]}') == {
+        'op': 'remove', 'hosts': ['a']}
+
+    for line in ['add 10.0.0.1', 'query', 'unknown', '{"op": "remove"}',
+                 '[1]', '{bad',
+                 '{"op": "add", "address": "10.0.0.1", "hosts": "abc"}',
+                 '{"op": "add", "address": "10.0.0.1", "hosts": 5}',
+                 '{"op": "add", "address": "10.0.0.1", "hosts": [1]}',
+                 '{"op": "add", "address": 1, "hosts": ["a"]}',
+                 '{"op": "remove-tag", "tag": "a", "partial": "yes"}',
+                 '{"op": "query", "host": ["a"]}']:
+        with pytest.raises(InvalidFormat):
+            parse_operation(line)
+
+
+def test_arguments_operations(hosts_path):
+    status, stdout, _ = run(['-f', hosts_path, 'add', '10.0.0.1', 'a',
+                             '#tag', ';', 'query', 'a'])
+    assert status == 0
+    assert stdout == '10.0.0.1\ta #tag\n'
+    assert open(hosts_path).read() == (
+        '127.0.0.1\tlocalhost\n10.0.0.1\ta #tag\n')
+
+
+def test_stdin_operations(hosts_path):
+    stdin = '\n'.join([
+        '# comments and blank lines are skipped',
+        '',
+        'add 10.0.0.1 a #tag',
+        '{"op": "add", "address": "10.0.0.2", "hosts": ["b"], '
+        '"comment": "tag"}',
+        'add 10.0.0.3 c',
+        'remove-tag tag',
+        'query 10.0.0.3',
+    ])
+    status, stdout, _ = run(['-f', hosts_path, '--json'], stdin)
+    assert status == 0
+    assert json.loads(stdout)['entries'] == [
+        {'address': '10.0.0.3', 'hosts': ['c'], 'comment': None}]
+    assert open(hosts_path).read() == (
+        '127.0.0.1\tlocalhost\n10.0.0.3\tc\n')
+
+
+def test_failed_operation(hosts_path):
+    stdin = 'add 10.0.0.1 a\nadd 127.0.0.1 localhost\n'
+
+    status, _, stderr = run(['-f', hosts_path], stdin)
+    assert status == 1
+    assert 'operation 2' in stderr
+    assert open(hosts_path).read() == '127.0.0.1\tlocalhost\n'
+
+    status, _, _ = run(['-f', hosts_path, '--keep-going'], stdin)
+    assert status == 1
+    assert open(hosts_path).read() == '127.0.0.1\tlocalhost\n10.0.0.1\ta\n'
+
+
+def test_dry_run_and_output(hosts_path):
+    status, stdout, _ = run(
+        ['-f', hosts_path, '-o', '-', 'add', '10.0.0.1', 'a'])
+    assert status == 0
+    assert stdout == '127.0.0.1\tlocalhost\n10.0.0.1\ta\n'
+    assert open(hosts_path).read() == '127.0.0.1\tlocalhost\n'
+
+    run(['-f', hosts_path, '-n', 'remove', 'localhost'])
+    assert open(hosts_path).read() == '127.0.0.1\tlocalhost\n'
+
+
+def test_partial_tag_without_comments(hosts_path):
+    stdin = '{"op": "remove-tag", "tag": "x", "partial": true}\n'
+    status, _, _ = run(['-f', hosts_path], stdin)
+    assert status == 0
+    assert open(hosts_path).read() == '127.0.0.1\tlocalhost\n'
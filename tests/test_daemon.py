@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `hostsmgr.daemon` module."""
+
+import socket
+import pytest
+import hostsmgr.daemon
+from hostsmgr.daemon import HostsDaemon, HostsClient
+from hostsmgr.conditions import Host
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, 'AF_UNIX'), reason='Unix domain socket unsupported')
+
+
+@pytest.fixture
+def paths(tmpdir):
+    path = tmpdir.join('hosts')
+    path.write("127.0.0.1\tlocalhost\n")
+    return str(path), str(tmpdir.join('hostsmgr.sock'))
+
+
+def test_lookups_and_mutations(paths):
+    path, socket_path = paths
+    with HostsDaemon(path, socket_path, debounce=60):
+        with HostsClient(socket_path, timeout=5) as client:
+            assert client.resolve('localhost') == ['127.0.0.1']
+            assert client.add('10.0.0.1', ['a', 'b'], 'tag')
+            assert client.find(host='a') == [
+                {'address': '10.0.0.1', 'hosts': ['a', 'b'],
+                 'comment': 'tag'}]
+            assert client.find(address='10.0.0.1')
+            assert client.remove(['b'])
+
+            with pytest.raises(ValueError):
+                client.add('10.0.0.1', ['a'])
+            with pytest.raises(ValueError):
+                client.request({'op': 'unknown'})
+
+            # Nothing saved before debounce interval
+            assert open(path).read() == "127.0.0.1\tlocalhost\n"
+
+    # Pending changes are saved on shutdown
+    assert open(path).read() == "127.0.0.1\tlocalhost\n10.0.0.1\ta #tag\n"
+
+
+def test_coalesced_save(paths):
+    path, socket_path = paths
+    with HostsDaemon(path, socket_path, debounce=60) as daemon:
+        with HostsClient(socket_path, timeout=5) as client:
+            for i in range(10):
+                client.add('10.0.0.%s' % i, ['host%s' % i])
+            assert client.remove_tag('nothing') is False
+            assert client.flush()
+
+            assert len(open(path).readlines()) == 11
+            assert len(daemon.mgr.find(Host('host9'))) == 1
+
+
+def test_unexpected_errors_keep_connection(paths, monkeypatch):
+    path, socket_path = paths
+    with HostsDaemon(path, socket_path, debounce=60) as daemon:
+        with HostsClient(socket_path, timeout=5) as client:
+            def broken(op):
+                raise TypeError('broken')
+
+            monkeypatch.setattr(daemon, 'execute', broken)
+            with pytest.raises(ValueError) as excinfo:
+                client.resolve('localhost')
+            assert 'broken' in str(excinfo.value)
+
+            monkeypatch.undo()
+            assert client.resolve('localhost') == ['127.0.0.1']
+
+
+def test_failed_save_stays_pending(paths, monkeypatch):
+    path, socket_path = paths
+    with HostsDaemon(path, socket_path, debounce=60):
+        with HostsClient(socket_path, timeout=5) as client:
+            client.add('10.0.0.1', ['a'])
+
+            def failed_write(*args):
+                raise OSError(28, 'No space left on device')
+
+            monkeypatch.setattr(hostsmgr.daemon, 'write_atomic', failed_write)
+            with pytest.raises(ValueError):
+                client.flush()
+
+            monkeypatch.undo()
+            assert client.flush()
+            assert open(path).read() == (
+                "127.0.0.1\tlocalhost\n10.0.0.1\ta\n")
+
+
+def test_refuse_live_socket(paths):
+    path, socket_path = paths
+    with HostsDaemon(path, socket_path, debounce=60):
+        with pytest.raises(OSError):
+            HostsDaemon(path, socket_path)
+
+    # A socket nobody listens on is taken over
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path)
+    stale.close()
+    with HostsDaemon(path, socket_path, debounce=60):
+        with HostsClient(socket_path, timeout=5) as client:
+            assert client.resolve('localhost') == ['127.0.0.1']
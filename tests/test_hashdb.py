@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `hostsmgr.hashdb` module."""
+
+import os
+import pytest
+from hostsmgr import HostsMgr
+from hostsmgr.hashdb import HashDB, open_compiled
+from hostsmgr.conditions import Host, IPAddress, InlineComment
+
+
+@pytest.fixture
+def db(tmpdir):
+    mgr = HostsMgr()
+    mgr.loads("# comment\n"
+              "127.0.0.1 localhost\n"
+              "::1 localhost ip6-localhost\n"
+              "10.0.0.1 db cache\n"
+              "10.0.0.1 db\n"
+              "0:0::1 loopback\n")
+
+    path = str(tmpdir.join('hosts.cdb'))
+    mgr.export_hashdb(path)
+    with HashDB(path) as db:
+        yield db
+
+
+def test_lookups(db):
+    assert db.addresses('localhost') == ['127.0.0.1', '::1']
+    assert db.addresses('db') == ['10.0.0.1']
+    assert db.addresses('missing') == []
+    assert db.hosts('::1') == ['localhost', 'ip6-localhost', 'loopback']
+    assert db.hosts('0::1') == db.hosts('::1')
+    assert db.hosts('10.0.0.2') == []
+    assert db.signature is None
+
+
+def test_find(db):
+    entries = db.find(Host('localhost'))
+    assert [e.expansion for e in entries] == [
+        '127.0.0.1\tlocalhost', '::1\tlocalhost']
+
+    assert db.check([IPAddress('10.0.0.1'), Host('cache')])
+    assert not db.check(IPAddress('10.0.0.1') & Host('localhost'))
+    assert not db.check(Host('db') & InlineComment('tag'))
+
+    with pytest.raises(ValueError):
+        db.find(InlineComment('tag'))
+
+
+def test_regenerated_when_source_changed(tmpdir):
+    source = tmpdir.join('hosts')
+    source.write("10.0.0.1 db\n")
+
+    with open_compiled(str(source)) as db:
+        assert db.addresses('db') == ['10.0.0.1']
+
+    db_path = str(tmpdir.join('hosts.cdb'))
+    mtime = os.stat(db_path).st_mtime_ns
+    with open_compiled(str(source)) as db:
+        assert os.stat(db_path).st_mtime_ns == mtime
+
+    source.write("10.0.0.2 db\n")
+    os.utime(str(source), ns=(0, 12345))
+    with open_compiled(str(source)) as db:
+        assert db.addresses('db') == ['10.0.0.2']
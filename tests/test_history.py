@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `hostsmgr.history` module."""
+
+import pytest
+from hostsmgr import HostsMgr
+from hostsmgr.history import HistoryStore
+from hostsmgr.entries import HostsEntry
+from hostsmgr.conditions import InlineComment
+
+
+@pytest.mark.parametrize('compression', ['gzip', 'lzma', None])
+def test_record_and_restore(tmpdir, compression):
+    store = HistoryStore(str(tmpdir.join('history')), snapshot_interval=3,
+                         compression=compression)
+    texts = ['127.0.0.1 localhost\n']
+    for i in range(7):
+        lines = texts[-1].splitlines(True)
+        lines.insert(i % len(lines), '10.0.0.%s host%s\n' % (i, i))
+        if i % 3 == 2:
+            del lines[-1]
+        texts.append(''.join(lines))
+    texts.append('')
+
+    for i, text in enumerate(texts):
+        assert store.record(text) == i + 1
+    # Same as the latest version, not recorded
+    assert store.record('') == len(texts)
+
+    assert [v.kind for v in store.versions()] == [
+        'full', 'delta', 'delta', 'full', 'delta', 'delta', 'full', 'delta',
+        'delta']
+
+    # Restore from another store instance, without the cached latest lines
+    reopened = HistoryStore(str(tmpdir.join('history')))
+    for i, text in enumerate(texts):
+        assert reopened.restore(i + 1) == text
+
+    with pytest.raises(ValueError):
+        reopened.restore(100)
+
+    assert reopened.record('changed\n') == len(texts) + 1
+    assert reopened.restore(len(texts) + 1) == 'changed\n'
+
+
+def test_save_history(tmpdir):
+    store = HistoryStore(str(tmpdir.join('history')))
+    path = str(tmpdir.join('hosts'))
+
+    mgr = HostsMgr()
+    mgr.loads("127.0.0.1 localhost\n")
+    mgr.save(path, history=store)
+    mgr.add(HostsEntry('10.0.0.1', ['db'], 'dev'))
+    mgr.save(path, atomic=True, history=store)
+    mgr.remove_by_inline_comment(InlineComment('dev'))
+    mgr.save(path, history=store)
+
+    assert [v.version for v in store.versions()] == [1, 2, 3]
+    assert store.restore(2) == "127.0.0.1\tlocalhost\n10.0.0.1\tdb #dev\n"
+
+    # Roll back
+    mgr.loads(store.restore(2))
+    mgr.save(path, history=store)
+    assert tmpdir.join('hosts').read() == store.restore(2)
+    assert store.versions()[-1].version == 4
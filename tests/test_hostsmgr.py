@@ -3,9 +3,13 @@
 
 """Tests for `hostsmgr` package."""
 
+import sys
+import errno
 import pytest
 import os.path
 import tempfile
+import subprocess
+import hostsmgr
 from hostsmgr import HostsMgr
 from hostsmgr.hostsmgr import guess_hosts_path
 from hostsmgr.entries import HostsEntry, CommentEntry, RawEntry
@@ -119,3 +123,95 @@ def test_access_through_file(mgr):
         'localhost') & Host('myhostname'))
     assert not mgr.check(IPAddress('127.0.0.1') & Host(
         'localhost') & Host('ip6-localhost'))
+
+
+def test_lazy_exports():
+    assert 'HostsMgr' in dir(hostsmgr)
+    assert hostsmgr.HostsMgr is HostsMgr
+
+    with pytest.raises(AttributeError):
+        hostsmgr.NotExists
+
+    if sys.version_info < (3, 7):
+        return
+
+    # Submodules must not be imported until the export is accessed
+    subprocess.check_call([sys.executable, '-c', (
+        "import sys, hostsmgr\n"
+        "assert 'hostsmgr.hostsmgr' not in sys.modules\n"
+        "assert 'six' not in sys.modules\n"
+        "hostsmgr.HostsMgr\n"
+        "assert 'hostsmgr.hostsmgr' in sys.modules\n")],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_dedupe(mgr):
+    mgr.loads("127.0.0.1 localhost a\n"
+              "127.0.0.1 a b\n"
+              "10.0.0.1 a\n"
+              "127.0.0.1 localhost\n")
+
+    assert mgr.dedupe()
+    assert mgr.saves() == ("127.0.0.1\tlocalhost a\n"
+                           "127.0.0.1\tb\n"
+                           "10.0.0.1\ta\n")
+    assert not mgr.dedupe()
+
+
+def test_atomic_save(mgr, tmpdir):
+    path = tmpdir.join('hosts')
+    path.write("old")
+    os.chmod(str(path), 0o600)
+
+    mgr.loads("127.0.0.1 localhost")
+    mgr.save(str(path), atomic=True)
+
+    assert path.read() == "127.0.0.1\tlocalhost\n"
+    assert os.stat(str(path)).st_mode & 0o777 == 0o600
+    assert tmpdir.listdir() == [path]
+
+
+def test_atomic_save_through_symlink(mgr, tmpdir):
+    target = tmpdir.join('hosts')
+    target.write("old")
+    link = tmpdir.join('link')
+    link.mksymlinkto(target)
+
+    mgr.loads("127.0.0.1 localhost")
+    mgr.save(str(link), atomic=True)
+
+    assert link.islink()
+    assert target.read() == "127.0.0.1\tlocalhost\n"
+
+
+def test_atomic_save_falls_back_in_place(mgr, tmpdir, monkeypatch):
+    path = tmpdir.join('hosts')
+    path.write("old")
+
+    def busy_replace(src, dst):
+        raise OSError(errno.EBUSY, 'Device or resource busy')
+
+    monkeypatch.setattr(os, 'replace', busy_replace)
+    mgr.loads("127.0.0.1 localhost")
+    mgr.save(str(path), atomic=True)
+
+    assert path.read() == "127.0.0.1\tlocalhost\n"
+    assert tmpdir.listdir() == [path]
+
+
+def test_ifind_and_count(mgr):
+    mgr.loads("127.0.0.1 localhost a\n10.0.0.1 a #tag\n10.0.0.2 a #tag\n")
+
+    found = mgr.ifind(Host('a'))
+    assert not isinstance(found, list)
+    assert next(found).hosts == ['localhost', 'a']
+    assert [e.address.compressed for e in mgr.iter_find(Host('a'), 2)] == [
+        '127.0.0.1', '10.0.0.1']
+
+    assert mgr.count(Host('a')) == 3
+    assert mgr.count(Host('b')) == 0
+
+    # Modify the hosts table while iterating
+    for entry in mgr.ifind(Host('a')):
+        mgr.remove(entry)
+    assert mgr.count(Host('a')) == 0
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `hostsmgr.importer` module."""
+
+from hostsmgr import HostsMgr
+from hostsmgr.importer import parse_line, import_blocklists
+from hostsmgr.conditions import Host, InlineComment
+
+
+def test_parse_line():
+    assert parse_line('Ads.Example.COM.\n') == 'ads.example.com'
+    assert parse_line('track.example.com # inline comment') == \
+        'track.example.com'
+    assert parse_line('||ads.example.org^') == 'ads.example.org'
+
+    for line in ['', '# comment', '! adblock comment', '[Adblock Plus 2.0]',
+                 '@@||ok.example.com^', '||ads.example.org^$third-party',
+                 '||*.example.org^', '/banner/*', 'two tokens']:
+        assert parse_line(line) is None
+
+
+def test_import_blocklists(tmpdir):
+    domains = tmpdir.join('domains.txt')
+    domains.write("# list\nads.example.com\nlocalhost\nADS.example.com\n")
+    adblock = tmpdir.join('adblock.txt')
+    adblock.write("! list\n||ads.example.com^\n||track.example.org^\n"
+                  "@@||good.example.org^\n")
+
+    mgr = HostsMgr(prefilter=0.01)
+    mgr.loads("127.0.0.1 localhost\n")
+    report = import_blocklists(mgr, [str(domains), str(adblock)],
+                               max_workers=2)
+
+    assert (report.sources, report.domains, report.added) == (2, 5, 2)
+    assert report.duplicates == 3
+    assert report.rate > 0
+    assert mgr.saves() == (
+        "127.0.0.1\tlocalhost\n"
+        "0.0.0.0\tads.example.com #blocklist\n"
+        "0.0.0.0\ttrack.example.org #blocklist\n")
+    assert mgr.check(Host('track.example.org'))
+
+    # Import again replaces the block
+    mgr.remove_by_inline_comment(InlineComment('blocklist'))
+    assert import_blocklists(mgr, [str(adblock)]).added == 2
+
+
+def test_import_with_normalizer(tmpdir):
+    from hostsmgr.normalize import Normalizer
+
+    source = tmpdir.join('domains.txt')
+    source.write("bücher.example\nxn--bcher-kva.example\nbad_name.com\n")
+
+    mgr = HostsMgr(normalizer=Normalizer())
+    report = import_blocklists(mgr, [str(source)])
+    assert (report.added, report.duplicates, report.invalid) == (1, 1, 1)
+    assert mgr.check(Host('xn--bcher-kva.example'))
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `hostsmgr.layers` module."""
+
+import os
+import pytest
+from hostsmgr.layers import LayeredHostsMgr
+
+
+@pytest.fixture
+def layered(tmpdir):
+    tmpdir.join('base').write("127.0.0.1 localhost\n10.0.0.1 db cache\n")
+    tmpdir.join('team').write("10.0.0.2 db\n")
+    tmpdir.join('blocklist').write("0.0.0.0 ads.example.com\n")
+
+    layered = LayeredHostsMgr(headers=False)
+    layered.mount(str(tmpdir.join('base')), priority=0, name='base')
+    layered.mount(str(tmpdir.join('team')), priority=10, name='team')
+    layered.mount(str(tmpdir.join('blocklist')), priority=0,
+                  name='blocklist')
+    return layered
+
+
+def test_merge_by_priority(layered):
+    assert layered.merged().saves() == (
+        "10.0.0.2\tdb\n"
+        "0.0.0.0\tads.example.com\n"
+        "127.0.0.1\tlocalhost\n"
+        "10.0.0.1\tcache\n")
+
+
+def test_cached_and_refreshed(layered, tmpdir):
+    merged = layered.merged()
+    assert layered.merged() is merged
+    assert layered.refresh() == []
+
+    team = tmpdir.join('team')
+    team.write("10.0.0.3 db\n")
+    # Make sure the stat signature changed even on coarse clocks
+    os.utime(str(team), ns=(0, 12345))
+    assert layered.refresh() == ['team']
+    assert layered.merged() is not merged
+    assert '10.0.0.3\tdb\n' in layered.merged().saves()
+
+    # Touched but same content is not parsed again
+    os.utime(str(team), ns=(0, 67890))
+    assert layered.refresh() == []
+
+    team.remove()
+    assert layered.refresh() == ['team']
+    assert '10.0.0.1\tdb cache\n' in layered.merged().saves()
+
+
+def test_mount_directory_and_save(tmpdir):
+    hosts_d = tmpdir.mkdir('hosts.d')
+    hosts_d.join('10-base').write("10.0.0.1 db\n")
+    hosts_d.join('50-override').write("10.0.0.9 db\n")
+    hosts_d.join('.hidden').write("10.0.0.8 db\n")
+
+    layered = LayeredHostsMgr()
+    assert len(layered.mount_directory(str(hosts_d))) == 2
+    with pytest.raises(ValueError):
+        layered.mount(str(hosts_d.join('10-base')))
+
+    output = tmpdir.join('hosts')
+    layered.save(str(output), atomic=True)
+    assert output.read() == (
+        "# layer: %s (priority 0)\n"
+        "10.0.0.9\tdb\n"
+        "# layer: %s (priority 0)\n" % (
+            hosts_d.join('50-override'), hosts_d.join('10-base')))
+
+    layered.unmount(str(hosts_d.join('50-override')))
+    assert '10.0.0.1\tdb\n' in layered.merged().saves()
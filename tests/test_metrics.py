@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `hostsmgr.metrics` module."""
+
+import io
+import logging
+from hostsmgr import HostsMgr
+from hostsmgr.metrics import Metrics, LoggingSink
+from hostsmgr.conditions import Host
+
+
+def test_disabled_by_default():
+    mgr = HostsMgr()
+    mgr.loads("127.0.0.1 localhost\n")
+    assert mgr.metrics is None
+    assert mgr.check(Host('localhost'))
+
+
+def test_operation_metrics():
+    metrics = Metrics()
+    mgr = HostsMgr(metrics=metrics)
+    mgr.loads("# comment\n127.0.0.1 localhost\n127.0.0.1\n\n"
+              "::1 ip6-localhost\n")
+
+    assert metrics.counter('hostsmgr_lines_parsed_total',
+                           type='HostsEntry') == 2
+    assert metrics.counter('hostsmgr_lines_parsed_total',
+                           type='CommentEntry') == 1
+    assert metrics.counter('hostsmgr_lines_parsed_total',
+                           type='RawEntry') == 2
+    assert metrics.counter('hostsmgr_parse_fallbacks_total') == 1
+    assert metrics.histogram('hostsmgr_load_seconds').count == 1
+
+    assert len(mgr.find(Host('localhost'))) == 1
+    assert metrics.counter('hostsmgr_find_scanned_total') == 5
+    assert metrics.counter('hostsmgr_find_matched_total') == 1
+
+    text = mgr.saves()
+    assert metrics.counter('hostsmgr_bytes_written_total') == len(text)
+
+
+def test_sinks():
+    events = []
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    logger = logging.getLogger('hostsmgr.tests.metrics')
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+
+    try:
+        metrics = Metrics(sinks=[lambda *args: events.append(args),
+                                 LoggingSink(logger)])
+        HostsMgr(metrics=metrics).saves()
+    finally:
+        logger.removeHandler(handler)
+
+    assert ('counter', 'hostsmgr_bytes_written_total', 0, {}) in events
+    assert 'hostsmgr_save_seconds' in stream.getvalue()
+
+
+def test_dump_prometheus():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.incr('requests_total', 3, type='a')
+    metrics.observe('latency_seconds', 0.5)
+
+    assert metrics.dump_prometheus() == (
+        '# TYPE requests_total counter\n'
+        'requests_total{type="a"} 3\n'
+        '# TYPE latency_seconds histogram\n'
+        'latency_seconds_bucket{le="0.1"} 0\n'
+        'latency_seconds_bucket{le="1.0"} 1\n'
+        'latency_seconds_bucket{le="+Inf"} 1\n'
+        'latency_seconds_sum 0.5\n'
+        'latency_seconds_count 1\n')
+
+
+def test_dump_prometheus_groups_families():
+    metrics = Metrics(buckets=(1.0,))
+    metrics.incr('a_total', type='x')
+    metrics.incr('b_total')
+    metrics.incr('a_total', type='y')
+
+    assert metrics.dump_prometheus() == (
+        '# TYPE a_total counter\n'
+        'a_total{type="x"} 1\n'
+        'a_total{type="y"} 1\n'
+        '# TYPE b_total counter\n'
+        'b_total 1\n')
+
+
+def test_bytes_written_in_utf8(tmpdir):
+    metrics = Metrics()
+    mgr = HostsMgr(metrics=metrics)
+    mgr.loads("127.0.0.1 caf\u00e9\n")
+
+    path = tmpdir.join('hosts')
+    mgr.save(str(path))
+    assert metrics.counter('hostsmgr_bytes_written_total') == len(
+        path.read_binary())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `hostsmgr.normalize` module."""
+
+import pytest
+from hostsmgr import HostsMgr
+from hostsmgr.normalize import normalize_hostname, Normalizer
+from hostsmgr.entries import HostsEntry, RawEntry
+from hostsmgr.exceptions import InvalidHostname, InvalidFormat
+from hostsmgr.conditions import Host
+
+
+def test_normalize_hostname():
+    assert normalize_hostname('Example.COM.') == 'example.com'
+    assert normalize_hostname('Bücher.example') == \
+        'xn--bcher-kva.example'
+    assert normalize_hostname('localhost') == 'localhost'
+    assert normalize_hostname('a-1.' + 'b' * 63) == 'a-1.' + 'b' * 63
+
+    for name in ['', '.', 'a..b', '-a.com', 'a-.com', 'under_score.com',
+                 'b' * 64 + '.com', 'a.' * 127 + 'com', 'sp ace']:
+        with pytest.raises(InvalidHostname):
+            normalize_hostname(name)
+
+    assert issubclass(InvalidHostname, InvalidFormat)
+
+
+def test_normalizer_cache():
+    normalizer = Normalizer(maxsize=2)
+    for name in ['A.com', 'A.com', 'B.com', 'A.com', 'C.com', 'B.com']:
+        normalizer(name)
+
+    info = normalizer.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (2, 4, 2)
+
+
+def test_hosts_mgr_normalizer():
+    normalizer = Normalizer()
+    mgr = HostsMgr(prefilter=0.01, normalizer=normalizer)
+    mgr.loads("127.0.0.1 LocalHost\n10.0.0.1 bad_name\n")
+
+    entries = list(mgr._entries)
+    assert isinstance(entries[0], HostsEntry)
+    assert entries[0].hosts == ['localhost']
+    # Lines with invalid hostnames are kept as they are
+    assert isinstance(entries[1], RawEntry)
+
+    assert mgr.check(Host('LOCALHOST.', normalizer))
+    assert not mgr.check(Host('LOCALHOST'))
+
+    mgr.add(HostsEntry('10.0.0.2', ['Bücher.Example']))
+    assert mgr.check(Host('xn--bcher-kva.example'))
+    with pytest.raises(ValueError):
+        mgr.add(HostsEntry('10.0.0.2', ['bücher.example']))
+    with pytest.raises(InvalidHostname):
+        mgr.add(HostsEntry('10.0.0.3', ['-bad']))
+
+    assert mgr.remove_hosts(['LocalHost'])
+    assert not mgr.check(Host('localhost'))
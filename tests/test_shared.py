@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `hostsmgr.shared` module."""
+
+from concurrent.futures import ProcessPoolExecutor
+from hostsmgr import HostsMgr
+from hostsmgr.shared import publish, SharedHostsTable
+from hostsmgr.conditions import Host
+
+
+def _resolve(path, host):
+    with SharedHostsTable(path) as table:
+        return table.generation, table.resolve(host)
+
+
+def test_publish_and_swap(tmpdir):
+    path = str(tmpdir.join('hosts.snapshot'))
+    mgr = HostsMgr()
+    mgr.loads("10.0.0.1 db\n::1 localhost\n")
+    assert publish(mgr, path) == 1
+
+    table = SharedHostsTable(path, check_interval=None)
+    assert table.resolve('db') == '10.0.0.1'
+    assert table.resolve('missing') is None
+    assert table.hosts('::1') == ['localhost']
+    assert table.check(Host('localhost'))
+    assert not table.refresh()
+
+    mgr.loads("10.0.0.2 db\n")
+    assert publish(mgr, path) == 2
+    # Not switched until refreshed
+    assert table.resolve('db') == '10.0.0.1'
+    assert table.refresh()
+    assert table.generation == 2
+    assert table.resolve('db') == '10.0.0.2'
+    assert [e.expansion for e in table.find(Host('db'))] == ['10.0.0.2\tdb']
+    table.close()
+
+    # Checked on every lookup
+    with SharedHostsTable(path, check_interval=0) as table:
+        mgr.loads("10.0.0.3 db\n")
+        publish(mgr, path)
+        assert table.resolve('db') == '10.0.0.3'
+
+
+def test_workers(tmpdir):
+    path = str(tmpdir.join('hosts.snapshot'))
+    mgr = HostsMgr()
+    mgr.loads("10.0.0.1 db\n")
+    publish(mgr, path)
+
+    with ProcessPoolExecutor(2) as executor:
+        results = list(executor.map(_resolve, [path] * 4, ['db'] * 4))
+
+    assert results == [(1, '10.0.0.1')] * 4
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `hostsmgr.storage` module."""
+
+import pytest
+from hostsmgr import HostsMgr
+from hostsmgr.storage import EntryList
+from hostsmgr.entries import HostsEntry, CommentEntry
+from hostsmgr.conditions import Host, InlineComment
+
+
+def make(count):
+    return [CommentEntry(str(i)) for i in range(count)]
+
+
+def values(entries):
+    return [entry.expansion for entry in entries]
+
+
+def test_order_and_positions():
+    a, b, c, d = make(4)
+    entries = EntryList([a, b])
+    entries.append(c)
+    entries.insert_after(a, d)
+    assert list(entries) == [a, d, b, c]
+    assert list(reversed(entries)) == [c, b, d, a]
+    assert entries[0] is a and entries[-1] is c and entries[2] is b
+
+    entries.move_before(a, c)
+    entries.move_after(c, b)
+    assert list(entries) == [c, b, a, d]
+
+    entries.remove(a)
+    assert len(entries) == 3 and a not in entries
+    with pytest.raises(IndexError):
+        entries[3]
+
+
+def test_invalid_handles():
+    a, b = make(2)
+    entries = EntryList([a])
+
+    with pytest.raises(ValueError):
+        entries.remove(b)
+    with pytest.raises(ValueError):
+        entries.append(a)
+    with pytest.raises(ValueError):
+        entries.insert_after(b, a)
+    with pytest.raises(ValueError):
+        entries.move_after(a, a)
+    # A failed move keeps the entry
+    assert list(entries) == [a]
+
+
+def test_remove_while_iterating():
+    entries_list = make(6)
+    entries = EntryList(entries_list)
+
+    seen = []
+    for entry in entries:
+        seen.append(entry)
+        # Remove the current, and one ahead of the iteration
+        entries.remove(entry)
+        ahead = entries_list[entries_list.index(entry) + 2:][:1]
+        if ahead and ahead[0] in entries:
+            entries.remove(ahead[0])
+
+    assert values(seen) == ['#0', '#1', '#4', '#5']
+    assert len(entries) == 0
+
+    entries.extend(make(3))
+    for entry in entries:
+        entries.clear()
+    assert list(entries) == []
+
+
+def test_hosts_mgr_handles():
+    mgr = HostsMgr()
+    mgr.loads("127.0.0.1 localhost\n10.0.0.1 a #tag\n10.0.0.2 b #tag\n")
+
+    localhost = mgr.find(Host('localhost'))[0]
+    entry = HostsEntry('10.0.0.3', ['c'])
+    mgr.insert_before(localhost, entry)
+    mgr.move_after(mgr.find(Host('b'))[0], localhost)
+    assert mgr.remove_by_inline_comment(InlineComment('tag'))
+    assert mgr.saves() == "10.0.0.3\tc\n127.0.0.1\tlocalhost\n"
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `hostsmgr.threadsafe` module."""
+
+import threading
+import pytest
+from hostsmgr.threadsafe import RWLock, ThreadSafeHostsMgr
+from hostsmgr.entries import HostsEntry
+from hostsmgr.conditions import Host, InlineComment
+
+BLOCK_SIZE = 20
+
+
+def refresh(mgr, generation):
+    with mgr.lock.writing():
+        mgr.remove_by_inline_comment(InlineComment('block'))
+        for i in range(BLOCK_SIZE):
+            mgr.add(HostsEntry('10.0.%s.%s' % (generation % 256, i),
+                               ['host%s' % i], 'block'))
+
+
+def test_rwlock_reentrant():
+    lock = RWLock()
+    with lock.writing():
+        with lock.reading():
+            with lock.writing():
+                pass
+
+    with lock.reading():
+        with lock.reading():
+            with pytest.raises(RuntimeError):
+                lock.acquire_write()
+
+    # Fully released
+    with lock.writing():
+        pass
+
+
+def test_concurrent_refresh_and_lookups():
+    mgr = ThreadSafeHostsMgr()
+    mgr.loads("127.0.0.1 localhost\n")
+    refresh(mgr, 0)
+
+    stop = threading.Event()
+    errors = []
+
+    def writer():
+        generation = 1
+        while not stop.is_set():
+            refresh(mgr, generation)
+            generation += 1
+
+    def reader():
+        for _ in range(300):
+            if not mgr.check(Host('localhost')):
+                errors.append('localhost missing')
+            found = mgr.find(InlineComment('block'))
+            if len(found) != BLOCK_SIZE:
+                errors.append('torn block : %s' % len(found))
+            if len(set(entry.address.packed[2] for entry in found)) != 1:
+                errors.append('mixed generations')
+
+    threads = [threading.Thread(target=writer) for _ in range(2)]
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads + readers:
+        thread.daemon = True
+        thread.start()
+    for thread in readers:
+        thread.join(timeout=30)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    assert not any(thread.is_alive() for thread in threads + readers)
+    assert errors == []
+    assert len(mgr.find(InlineComment('block'))) == BLOCK_SIZE